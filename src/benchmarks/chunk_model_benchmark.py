@@ -0,0 +1,149 @@
+"""Compare the pydantic chunk paths of ChunkModel with the raw-dict ones against a real MongoDB.
+
+    $ cd src && python -m benchmarks.chunk_model_benchmark --chunks 50000 --batch-size 1000 --max-in-flight 4
+
+It connects with MONGODB_URL from the app settings, works in a throwaway "<MONGODB_DATABASE>_benchmark"
+database and drops it at the end. For every path it reports the best wall time of a few runs
+and the resulting chunks per second.
+
+    - write: DataChunk objects through insert_many_chunks vs build_chunk_records and
+      insert_many_chunk_records (unordered batches, several in flight)
+    - read: iter_project_chunks (full documents validated as DataChunk) vs
+      iter_project_chunk_records with the indexing projection
+"""
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from helpers.config import get_settings
+from models.ChunkModel import ChunkModel
+from models.db_schemes import DataChunk
+from bson.objectid import ObjectId
+import argparse
+import asyncio
+import json
+import random
+import time
+
+WORDS = [
+    "retrieval", "augmented", "generation", "vector", "index", "chunk", "embedding", "query",
+    "document", "answer", "model", "the", "of", "and", "a", "to", "in", "is", "for", "with",
+]
+
+def generate_chunks(chunks_count: int, chunk_chars: int, seed: int = 7):
+    rnd = random.Random(seed)
+    chunks = []
+
+    for i in range(chunks_count):
+        words = []
+        while sum(len(word) + 1 for word in words) < chunk_chars:
+            words.append(rnd.choice(WORDS))
+
+        # the metadata the text chunker attaches to every chunk
+        chunks.append((" ".join(words), {"source": f"benchmark_{i // 1000}.txt", "page": i // 100}))
+
+    return chunks
+
+async def write_with_models(chunk_model: ChunkModel, chunks: list, project_id: ObjectId, asset_id: ObjectId, args):
+    return await chunk_model.insert_many_chunks(
+        chunks=[
+            DataChunk(
+                chunk_text=chunk_text,
+                chunk_metadata=chunk_metadata,
+                chunk_order=i+1,
+                chunk_project_id=project_id,
+                chunk_asset_id=asset_id
+            )
+            for i, (chunk_text, chunk_metadata) in enumerate(chunks)
+        ]
+    )
+
+async def write_with_records(chunk_model: ChunkModel, chunks: list, project_id: ObjectId, asset_id: ObjectId, args):
+    return await chunk_model.insert_many_chunk_records(
+        records=chunk_model.build_chunk_records(chunks=chunks, project_id=project_id, asset_id=asset_id),
+        batch_size=args.batch_size,
+        max_in_flight=args.max_in_flight,
+    )
+
+async def read_with_models(chunk_model: ChunkModel, project_id: ObjectId, args):
+    chunks_count = 0
+    async for page_chunks in chunk_model.iter_project_chunks(project_id=project_id, batch_size=args.read_batch_size):
+        chunks_count += len(page_chunks)
+
+    return chunks_count
+
+async def read_with_records(chunk_model: ChunkModel, project_id: ObjectId, args):
+    chunks_count = 0
+    async for page_chunks in chunk_model.iter_project_chunk_records(project_id=project_id,
+                                                                    batch_size=args.read_batch_size,
+                                                                    projection=chunk_model.INDEXING_PROJECTION):
+        chunks_count += len(page_chunks)
+
+    return chunks_count
+
+def report(name: str, timings: list, chunks_count: int):
+    return {
+        "path": name,
+        "chunks": chunks_count,
+        "best_seconds": round(min(timings), 3),
+        "chunks_per_second": round(chunks_count / min(timings), 2),
+    }
+
+async def run_benchmark(args):
+    settings = get_settings()
+    database_name = f"{settings.MONGODB_DATABASE}_benchmark"
+
+    mongo_conn = AsyncIOMotorClient(settings.MONGODB_URL)
+    db_client = mongo_conn[database_name]
+
+    try:
+        chunk_model = await ChunkModel.create_instance(db_client=db_client)
+
+        chunks = generate_chunks(chunks_count=args.chunks, chunk_chars=args.chunk_chars)
+        project_id = ObjectId()
+        asset_id = ObjectId()
+
+        print(f"chunks: {len(chunks)} of ~{args.chunk_chars} chars, batch_size={args.batch_size}, "
+              f"max_in_flight={args.max_in_flight}, read_batch_size={args.read_batch_size}")
+
+        for name, writer in [
+            ("write_models", write_with_models),
+            ("write_records", write_with_records),
+        ]:
+            timings = []
+            for _ in range(args.repeat):
+                _ = await chunk_model.delete_chunks_by_project_id(project_id=project_id)
+
+                started_at = time.perf_counter()
+                inserted_count = await writer(chunk_model, chunks, project_id, asset_id, args)
+                timings.append(time.perf_counter() - started_at)
+
+            print(json.dumps(report(name=name, timings=timings, chunks_count=inserted_count)))
+
+        for name, reader in [
+            ("read_models", read_with_models),
+            ("read_records_projection", read_with_records),
+        ]:
+            timings = []
+            for _ in range(args.repeat):
+                started_at = time.perf_counter()
+                read_count = await reader(chunk_model, project_id, args)
+                timings.append(time.perf_counter() - started_at)
+
+            print(json.dumps(report(name=name, timings=timings, chunks_count=read_count)))
+    finally:
+        await mongo_conn.drop_database(database_name)
+        mongo_conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pydantic and raw-dict chunk paths.")
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--chunk-chars", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--read-batch-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compare the text chunker with the span chunker on a large synthetic document.
+
+    $ cd src && python -m benchmarks.chunking_benchmark --size-mb 20 --chunk-size 500 --overlap-size 50
+
+For every chunker it reports the best wall time of a few runs, the peak memory allocated
+while chunking (tracemalloc) and how many characters of chunk text would be stored.
+"""
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from helpers.text_spans import iter_text_spans
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+WORDS = [
+    "retrieval", "augmented", "generation", "vector", "index", "chunk", "embedding", "query",
+    "document", "answer", "model", "the", "of", "and", "a", "to", "in", "is", "for", "with",
+]
+
+def generate_text(size_chars: int, seed: int = 7):
+    rnd = random.Random(seed)
+    paragraphs = []
+    total_chars = 0
+
+    while total_chars < size_chars:
+        sentences = [
+            " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(8, 25))).capitalize() + "."
+            for _ in range(rnd.randint(2, 8))
+        ]
+        lines = [ " ".join(sentences[i:i+2]) for i in range(0, len(sentences), 2) ]
+
+        paragraph = "\n".join(lines)
+        paragraphs.append(paragraph)
+        total_chars += len(paragraph) + 2
+
+    return "\n\n".join(paragraphs)
+
+def chunk_with_text_splitter(text: str, chunk_size: int, overlap_size: int):
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=overlap_size,
+        length_function=len,
+    )
+
+    # the way ProcessController.process_file_content chunks a page
+    documents = text_splitter.create_documents([ text ], metadatas=[ {"source": "benchmark"} ])
+
+    return len(documents), sum(len(document.page_content) for document in documents)
+
+def chunk_with_spans(text: str, chunk_size: int, overlap_size: int):
+    spans = list(iter_text_spans(text=text, chunk_size=chunk_size, overlap_size=overlap_size))
+
+    # span chunks store no text at all
+    return len(spans), 0
+
+def materialize_spans(text: str, chunk_size: int, overlap_size: int):
+    # the cost paid when a span chunk text is needed, e.g. when it is embedded
+    texts = [
+        text[start:end]
+        for start, end in iter_text_spans(text=text, chunk_size=chunk_size, overlap_size=overlap_size)
+    ]
+
+    return len(texts), sum(len(t) for t in texts)
+
+def run_benchmark(name: str, chunker, text: str, chunk_size: int, overlap_size: int, repeat: int):
+    timings = []
+
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        chunks_count, stored_chars = chunker(text, chunk_size, overlap_size)
+        timings.append(time.perf_counter() - started_at)
+
+    tracemalloc.start()
+    _ = chunker(text, chunk_size, overlap_size)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "chunker": name,
+        "chunks": chunks_count,
+        "best_seconds": round(min(timings), 3),
+        "mb_per_second": round(len(text) / 1048576 / min(timings), 2),
+        "peak_alloc_mb": round(peak_bytes / 1048576, 2),
+        "stored_text_chars": stored_chars,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the text and span chunkers.")
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = generate_text(size_chars=int(args.size_mb * 1048576))
+    print(f"document: {len(text)} chars, chunk_size={args.chunk_size}, overlap_size={args.overlap_size}")
+
+    for name, chunker in [
+        ("recursive_text_splitter", chunk_with_text_splitter),
+        ("spans", chunk_with_spans),
+        ("spans_materialized", materialize_spans),
+    ]:
+        print(json.dumps(run_benchmark(name=name, chunker=chunker, text=text, chunk_size=args.chunk_size,
+                                       overlap_size=args.overlap_size, repeat=args.repeat)))
+
+if __name__ == "__main__":
+    main()
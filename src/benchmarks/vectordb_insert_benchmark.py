@@ -0,0 +1,99 @@
+"""Measure how fast QdrantDBProvider.insert_many fills a collection of the local-path client.
+
+    $ cd src && python -m benchmarks.vectordb_insert_benchmark --points 20000 --dim 768 --batch-sizes 64,256,1024
+
+The previous insert path, models.Record objects sent through upload_records 50 at a time,
+runs as the baseline. Every run writes into a fresh collection of a temporary storage
+directory and reports the points inserted per second.
+"""
+
+from qdrant_client import models
+from stores.vectordb.providers import QdrantDBProvider
+from stores.vectordb.VectorDBEnums import DistanceMethodEnums
+import argparse
+import json
+import numpy as np
+import tempfile
+import time
+import uuid
+
+def generate_points(points_count: int, dim: int, seed: int = 7):
+    rnd = np.random.default_rng(seed)
+
+    vectors = rnd.standard_normal((points_count, dim), dtype=np.float32)
+    texts = [ f"benchmark chunk {i}" for i in range(points_count) ]
+    metadata = [ {"source": f"benchmark_{i // 1000}.txt"} for i in range(points_count) ]
+    record_ids = [ str(uuid.uuid4()) for _ in range(points_count) ]
+
+    return texts, vectors, metadata, record_ids
+
+def insert_with_records(provider: QdrantDBProvider, collection_name: str, texts: list, vectors: np.ndarray,
+                        metadata: list, record_ids: list, batch_size: int):
+    # the insert path before the columnar batches
+    vectors = vectors.tolist()
+
+    for i in range(0, len(texts), batch_size):
+        batch_end = i + batch_size
+
+        provider.client.upload_records(
+            collection_name=collection_name,
+            records=[
+                models.Record(id=record_ids[x], vector=vectors[x], payload={"text": texts[x], "metadata": metadata[x]})
+                for x in range(i, min(batch_end, len(texts)))
+            ],
+        )
+
+    return True
+
+def insert_with_batches(provider: QdrantDBProvider, collection_name: str, texts: list, vectors: np.ndarray,
+                        metadata: list, record_ids: list, batch_size: int):
+    return provider.insert_many(collection_name=collection_name, texts=texts, vectors=vectors,
+                                metadata=metadata, record_ids=record_ids, batch_size=batch_size)
+
+def run_benchmark(provider: QdrantDBProvider, name: str, inserter, points: tuple, batch_size: int):
+    texts, vectors, metadata, record_ids = points
+    collection_name = f"benchmark_{name}_{batch_size}"
+
+    _ = provider.create_collection(collection_name=collection_name, embedding_size=vectors.shape[1], do_reset=True)
+
+    started_at = time.perf_counter()
+    is_inserted = inserter(provider, collection_name, texts, vectors, metadata, record_ids, batch_size)
+    elapsed_seconds = time.perf_counter() - started_at
+
+    points_count = provider.get_collection_info(collection_name=collection_name).points_count
+    _ = provider.delete_collection(collection_name=collection_name)
+
+    return {
+        "path": name,
+        "batch_size": batch_size,
+        "is_inserted": is_inserted,
+        "points": points_count,
+        "seconds": round(elapsed_seconds, 3),
+        "points_per_second": round(points_count / elapsed_seconds, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the qdrant bulk insert path.")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--batch-sizes", default="64,256,1024")
+    args = parser.parse_args()
+
+    points = generate_points(points_count=args.points, dim=args.dim)
+    print(f"points: {args.points}, dim: {args.dim}")
+
+    with tempfile.TemporaryDirectory() as db_path:
+        provider = QdrantDBProvider(db_path=db_path, distance_method=DistanceMethodEnums.COSINE.value)
+        provider.connect()
+
+        print(json.dumps(run_benchmark(provider=provider, name="upload_records", inserter=insert_with_records,
+                                       points=points, batch_size=50)))
+
+        for batch_size in [ int(size) for size in args.batch_sizes.split(",") ]:
+            print(json.dumps(run_benchmark(provider=provider, name="insert_many", inserter=insert_with_batches,
+                                           points=points, batch_size=batch_size)))
+
+        provider.disconnect()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare the numpy exact-search backend with qdrant local mode on the same points.
+
+    $ cd src && python -m benchmarks.vectordb_search_benchmark --points 50000 --dim 768 --queries 200
+
+For every backend it reports how long filling the collection took, how long a fresh
+provider needs to open the stored collection and answer its first query (warm start),
+the queries per second of search_by_vector and the top-k overlap with the exact results.
+"""
+
+from stores.vectordb.providers import QdrantDBProvider, NumpyDBProvider
+from stores.vectordb.VectorDBEnums import DistanceMethodEnums
+import argparse
+import json
+import numpy as np
+import os
+import tempfile
+import time
+import uuid
+
+COLLECTION_NAME = "benchmark"
+
+def generate_points(points_count: int, dim: int, queries_count: int, seed: int = 7):
+    rnd = np.random.default_rng(seed)
+
+    vectors = rnd.standard_normal((points_count, dim), dtype=np.float32)
+    queries = rnd.standard_normal((queries_count, dim), dtype=np.float32)
+    texts = [ f"benchmark chunk {i}" for i in range(points_count) ]
+    record_ids = [ str(uuid.uuid4()) for _ in range(points_count) ]
+
+    return texts, vectors, record_ids, queries
+
+def get_exact_results(vectors: np.ndarray, queries: np.ndarray, limit: int):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = queries @ normalized.T
+
+    return [ set(np.argsort(-row)[:limit].tolist()) for row in scores ]
+
+def run_benchmark(name: str, provider_class, db_path: str, points: tuple, limit: int, batch_size: int):
+    texts, vectors, record_ids, queries = points
+    text_rows = { text: row for row, text in enumerate(texts) }
+
+    provider = provider_class(db_path=db_path, distance_method=DistanceMethodEnums.COSINE.value)
+    provider.connect()
+    _ = provider.create_collection(collection_name=COLLECTION_NAME, embedding_size=vectors.shape[1], do_reset=True)
+
+    started_at = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        _ = provider.insert_many(collection_name=COLLECTION_NAME, texts=texts[i:i+batch_size],
+                                 vectors=vectors[i:i+batch_size], record_ids=record_ids[i:i+batch_size])
+    insert_seconds = time.perf_counter() - started_at
+    provider.disconnect()
+
+    # a new provider on the same storage, as after a restart
+    started_at = time.perf_counter()
+    provider = provider_class(db_path=db_path, distance_method=DistanceMethodEnums.COSINE.value)
+    provider.connect()
+    _ = provider.search_by_vector(collection_name=COLLECTION_NAME, vector=queries[0].tolist(), limit=limit)
+    warm_start_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    results = [
+        provider.search_by_vector(collection_name=COLLECTION_NAME, vector=query.tolist(), limit=limit)
+        for query in queries
+    ]
+    search_seconds = time.perf_counter() - started_at
+    provider.disconnect()
+
+    exact_results = get_exact_results(vectors=vectors, queries=queries, limit=limit)
+    recall = np.mean([
+        len(set(text_rows[document.text] for document in documents) & exact) / limit
+        for documents, exact in zip(results, exact_results)
+    ])
+
+    return {
+        "backend": name,
+        "points": len(texts),
+        "insert_seconds": round(insert_seconds, 3),
+        "warm_start_seconds": round(warm_start_seconds, 3),
+        "queries_per_second": round(len(queries) / search_seconds, 2),
+        f"recall_at_{limit}": round(float(recall), 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the numpy and qdrant local vector db backends.")
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    points = generate_points(points_count=args.points, dim=args.dim, queries_count=args.queries)
+    print(f"points: {args.points}, dim: {args.dim}, queries: {args.queries}, limit: {args.limit}")
+
+    with tempfile.TemporaryDirectory() as db_path:
+        for name, provider_class in [
+            ("numpy", NumpyDBProvider),
+            ("qdrant_local", QdrantDBProvider),
+        ]:
+            print(json.dumps(run_benchmark(name=name, provider_class=provider_class,
+                                           db_path=os.path.join(db_path, name), points=points,
+                                           limit=args.limit, batch_size=args.batch_size)))
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
 from .BaseController import BaseController
 from .ProjectController import ProjectController
 from fastapi import UploadFile
-from models import ResponseSignal
+from models import ResponseSignal, ProcessingEnum
+import glob
+import hashlib
+import logging
 import re
 import os
+import shutil
 
 class DataController(BaseController):
     
     def __init__(self):
         super().__init__()
         self.size_scale = 1048576 # convert MB to bytes
+        self.blobs_dir = os.path.join(self.files_dir, ".blobs")
+        self.logger = logging.getLogger(__name__)
 
     def validate_uploaded_file(self, file: UploadFile):
 
@@ -54,4 +60,67 @@ class DataController(BaseController):
 
         return cleaned_file_name
 
+    def get_blob_path(self, file_hash: str):
+        return os.path.join(self.blobs_dir, file_hash[:2], file_hash)
+
+    def link_shared_blob(self, file_path: str, file_hash: str):
+        """Make the uploaded file and every earlier upload with the same content
+        hard links of one blob, so the bytes are stored once across projects."""
+
+        blob_path = self.get_blob_path(file_hash=file_hash)
+
+        try:
+            if os.path.exists(blob_path):
+                temp_file_path = f"{file_path}.tmp"
+                os.link(blob_path, temp_file_path)
+                os.replace(temp_file_path, file_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.link(file_path, blob_path)
+        except OSError as e:
+            # e.g. the files and blobs directories are on different devices, keep the plain copy
+            self.logger.error(f"Error while linking the shared blob of {file_path}: {e}")
+            return False
+
+        return True
+
+    def iter_source_files(self, source: str):
+        """Yield the supported files of a directory, searched recursively, or of a glob pattern."""
+
+        if os.path.isdir(source):
+            file_paths = (
+                os.path.join(dir_path, file_name)
+                for dir_path, _, file_names in os.walk(source)
+                for file_name in file_names
+            )
+        else:
+            file_paths = glob.iglob(source, recursive=True)
+
+        supported_extensions = [ e.value for e in ProcessingEnum ]
+
+        for file_path in sorted(file_paths):
+            if os.path.isfile(file_path) and os.path.splitext(file_path)[-1] in supported_extensions:
+                yield file_path
+
+    def get_file_hash(self, file_path: str):
+        file_hash = hashlib.sha256()
+
+        with open(file_path, "rb") as f:
+            while block := f.read(self.app_settings.FILE_DEFAULT_CHUNK_SIZE):
+                file_hash.update(block)
+
+        return file_hash.hexdigest()
+
+    def copy_file_into_project(self, source_path: str, project_id: str, do_link: bool = False):
+
+        file_path, file_id = self.generate_unique_filepath(
+            orig_file_name=os.path.basename(source_path),
+            project_id=project_id
+        )
+
+        if do_link:
+            os.link(source_path, file_path)
+        else:
+            shutil.copyfile(source_path, file_path)
 
+        return file_path, file_id
@@ -0,0 +1,418 @@
+from .BaseController import BaseController
+from .ProcessController import ProcessController
+from models import ResponseSignal
+from models.db_schemes import Job, Project
+from models.enums.AssetTypeEnum import AssetTypeEnum
+from models.enums.JobStatusEnum import JobStatusEnum
+from models.enums.JobTypeEnum import JobTypeEnum
+from models.enums.ChunkingModeEnum import ChunkingModeEnum
+from helpers.job_progress import JobProgress
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+class JobController(BaseController):
+    """Runs process and index push jobs as asyncio tasks of the app, while their state,
+    progress and checkpoints live in the jobs collection."""
+
+    def __init__(self, app):
+        super().__init__()
+
+        # the app holds the shared models and controllers and the parsing pool the jobs run on
+        self.app = app
+        self.job_model = None
+
+        self.tasks = {}
+        self.cancelled_tasks = set()
+        self.project_locks = {}
+
+        # every app process (e.g. each uvicorn worker) only runs the jobs it holds a lease on
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leases_task = None
+
+        self.logger = logging.getLogger(__name__)
+
+    async def connect(self):
+        self.job_model = self.app.container.job_model
+        self.leases_task = asyncio.create_task(self.keep_job_leases())
+
+    async def disconnect(self):
+        if self.leases_task is not None:
+            self.leases_task.cancel()
+            _ = await asyncio.gather(self.leases_task, return_exceptions=True)
+
+        # interrupted jobs stay queued or running in the db and are resumed on the next startup
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+
+        _ = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # released, so the next process to start takes them over without waiting for the leases to expire
+        _ = await self.job_model.release_job_leases(job_owner=self.owner_id)
+
+    async def keep_job_leases(self):
+        while True:
+            await asyncio.sleep(self.app_settings.JOBS_LEASE_SECONDS / 3)
+
+            try:
+                for job_id, task in list(self.tasks.items()):
+                    is_renewed = await self.job_model.renew_job_lease(
+                        job_id=job_id,
+                        job_owner=self.owner_id,
+                        lease_seconds=self.app_settings.JOBS_LEASE_SECONDS,
+                        job_statuses=[ JobStatusEnum.QUEUED.value, JobStatusEnum.RUNNING.value ],
+                    )
+
+                    # cancelled through another process, or taken over after a missed renewal
+                    if not is_renewed and not task.done():
+                        self.cancelled_tasks.add(task)
+                        task.cancel()
+
+                # the jobs of a worker that died without releasing them
+                if self.app_settings.JOBS_RESUME_ON_STARTUP:
+                    _ = await self.resume_interrupted_jobs()
+            except Exception as e:
+                self.logger.error(f"Error while renewing job leases: {e}")
+
+    def get_project_lock(self, project_id):
+        # one job at a time per project, whatever its type: a process job replaces the chunks
+        # a push reads, and a push deletes the vectors of chunks it no longer finds
+        key = str(project_id)
+
+        if key not in self.project_locks:
+            self.project_locks[key] = asyncio.Lock()
+
+        return self.project_locks[key]
+
+    def get_job_summary(self, job: Job):
+        return {
+            "job_id": str(job.id),
+            "job_type": job.job_type,
+            "job_status": job.job_status,
+            "job_params": job.job_params,
+            "job_progress": job.job_progress,
+            "job_result": job.job_result,
+            "job_error": job.job_error,
+            "job_created_at": job.job_created_at.isoformat() if job.job_created_at else None,
+            "job_started_at": job.job_started_at.isoformat() if job.job_started_at else None,
+            "job_updated_at": job.job_updated_at.isoformat() if job.job_updated_at else None,
+            "job_finished_at": job.job_finished_at.isoformat() if job.job_finished_at else None,
+        }
+
+    def schedule_job(self, job: Job):
+        task = asyncio.create_task(self.run_job(job=job))
+
+        self.tasks[job.id] = task
+        task.add_done_callback(lambda _: self.forget_job_task(job_id=job.id, task=task))
+
+        return task
+
+    def forget_job_task(self, job_id, task: asyncio.Task):
+        # a resumed job may already have a new task while its cancelled one is still unwinding
+        if self.tasks.get(job_id) is task:
+            self.tasks.pop(job_id)
+
+        self.cancelled_tasks.discard(task)
+
+    async def submit_job(self, project: Project, job_type: str, job_params: dict):
+
+        job = await self.job_model.create_job(job=Job(
+            job_project_id=project.id,
+            job_type=job_type,
+            job_status=JobStatusEnum.QUEUED.value,
+            job_params=job_params,
+            job_created_at=datetime.utcnow(),
+            job_owner=self.owner_id,
+            job_lease_expires_at=datetime.utcnow() + timedelta(seconds=self.app_settings.JOBS_LEASE_SECONDS),
+        ))
+
+        self.schedule_job(job=job)
+
+        return job
+
+    async def cancel_job(self, job_id: str):
+
+        job = await self.job_model.get_job(job_id=job_id)
+        if job is None:
+            return None
+
+        is_cancelled = await self.job_model.update_job(
+            job_id=job.id,
+            fields={
+                "job_status": JobStatusEnum.CANCELLED.value,
+                "job_finished_at": datetime.utcnow(),
+                # the owning process notices on its next lease renewal and stops the job
+                "job_owner": None,
+            },
+            from_statuses=[ JobStatusEnum.QUEUED.value, JobStatusEnum.RUNNING.value ],
+        )
+
+        if not is_cancelled:
+            return False
+
+        if job.id in self.tasks:
+            self.cancelled_tasks.add(self.tasks[job.id])
+            self.tasks[job.id].cancel()
+
+        return True
+
+    async def resume_job(self, job_id: str):
+        """Run a failed or cancelled job again, continuing from its last checkpoint."""
+
+        job = await self.job_model.get_job(job_id=job_id)
+        if job is None:
+            return None
+
+        is_queued = await self.job_model.claim_job(
+            job_id=job.id,
+            job_owner=self.owner_id,
+            lease_seconds=self.app_settings.JOBS_LEASE_SECONDS,
+            fields={
+                "job_status": JobStatusEnum.QUEUED.value,
+                "job_finished_at": None,
+            },
+            from_statuses=[ JobStatusEnum.FAILED.value, JobStatusEnum.CANCELLED.value ],
+        )
+
+        if not is_queued:
+            return False
+
+        self.schedule_job(job=job)
+
+        return True
+
+    async def resume_interrupted_jobs(self):
+        # jobs still queued or running in the db were cut off by a shutdown, unless another
+        # process holds a live lease on them: it is running them right now
+        jobs = await self.job_model.get_jobs_by_status(
+            job_statuses=[ JobStatusEnum.QUEUED.value, JobStatusEnum.RUNNING.value ]
+        )
+
+        resumed_jobs_count = 0
+        for job in jobs:
+            if job.id in self.tasks:
+                continue
+
+            is_claimed = await self.job_model.claim_job(
+                job_id=job.id,
+                job_owner=self.owner_id,
+                lease_seconds=self.app_settings.JOBS_LEASE_SECONDS,
+                fields={ "job_status": JobStatusEnum.QUEUED.value },
+                from_statuses=[ JobStatusEnum.QUEUED.value, JobStatusEnum.RUNNING.value ],
+            )
+
+            if is_claimed:
+                self.schedule_job(job=job)
+                resumed_jobs_count += 1
+
+        return resumed_jobs_count
+
+    async def run_job(self, job: Job):
+
+        async with self.get_project_lock(project_id=job.job_project_id):
+
+            # the job may have been cancelled while it was waiting for its turn
+            is_started = await self.job_model.update_job(
+                job_id=job.id,
+                fields={
+                    "job_status": JobStatusEnum.RUNNING.value,
+                    "job_started_at": datetime.utcnow(),
+                    "job_error": None,
+                },
+                from_statuses=[ JobStatusEnum.QUEUED.value ],
+                job_owner=self.owner_id,
+            )
+
+            if not is_started:
+                return
+
+            job_handlers = {
+                JobTypeEnum.PROCESS.value: self.run_process_job,
+                JobTypeEnum.INDEX_PUSH.value: self.run_index_push_job,
+            }
+
+            try:
+                is_succeeded, job_result = await job_handlers[job.job_type](job=job)
+            except asyncio.CancelledError:
+                if asyncio.current_task() not in self.cancelled_tasks:
+                    # shutting down, leave the job to be resumed from its checkpoint
+                    _ = await self.job_model.update_job(
+                        job_id=job.id,
+                        fields={ "job_status": JobStatusEnum.QUEUED.value },
+                        from_statuses=[ JobStatusEnum.RUNNING.value ],
+                        job_owner=self.owner_id,
+                    )
+
+                raise
+            except Exception as e:
+                self.logger.error(f"Error while running job: {job.id}: {e}")
+
+                _ = await self.job_model.update_job(
+                    job_id=job.id,
+                    fields={
+                        "job_status": JobStatusEnum.FAILED.value,
+                        "job_error": str(e),
+                        "job_finished_at": datetime.utcnow(),
+                        "job_owner": None,
+                    },
+                    from_statuses=[ JobStatusEnum.RUNNING.value ],
+                    job_owner=self.owner_id,
+                )
+                return
+
+            _ = await self.job_model.update_job(
+                job_id=job.id,
+                fields={
+                    "job_status": JobStatusEnum.COMPLETED.value if is_succeeded else JobStatusEnum.FAILED.value,
+                    "job_result": job_result,
+                    "job_finished_at": datetime.utcnow(),
+                    "job_owner": None,
+                },
+                from_statuses=[ JobStatusEnum.RUNNING.value ],
+                job_owner=self.owner_id,
+            )
+
+    async def run_process_job(self, job: Job):
+
+        job_params = job.job_params
+
+        project_model = self.app.container.project_model
+        asset_model = self.app.container.asset_model
+        chunk_model = self.app.container.chunk_model
+
+        project = await project_model.get_project_by_id(project_id=job.job_project_id)
+        if project is None:
+            raise ValueError(f"Project not found: {job.job_project_id}")
+
+        if job_params.get("file_id"):
+            asset_record = await asset_model.get_asset_record(
+                asset_project_id=project.id,
+                asset_name=job_params["file_id"]
+            )
+            asset_records = [ asset_record ] if asset_record else []
+        else:
+            asset_records = await asset_model.get_all_project_assets(
+                asset_project_id=project.id,
+                asset_type=AssetTypeEnum.FILE.value,
+            )
+
+        # files completed by an earlier run of this job are not processed again
+        done_asset_ids = set(job.job_checkpoint.get("done_asset_ids", []))
+
+        progress = JobProgress(total_key="files_total", done_key="files_done", counters={
+            "files_total": len(asset_records),
+            "files_done": len(done_asset_ids),
+            "files_skipped": job.job_progress.get("files_skipped", 0),
+            "files_failed": 0,
+            "chunks_done": job.job_progress.get("chunks_done", 0),
+        })
+
+        async def on_asset_processed(asset_record, inserted_chunks, is_skipped, error):
+            progress.increment(
+                files_done=1,
+                files_skipped=1 if is_skipped else 0,
+                files_failed=1 if error is not None else 0,
+                chunks_done=inserted_chunks,
+            )
+
+            # failed files are tried again when the job is resumed
+            if error is None:
+                done_asset_ids.add(asset_record.id)
+
+            _ = await self.job_model.update_job(
+                job_id=job.id,
+                fields={
+                    "job_progress": progress.to_dict(),
+                    "job_checkpoint": { "done_asset_ids": list(done_asset_ids) },
+                },
+            )
+
+        process_controller = ProcessController(project_id=project.project_id)
+
+        process_result = await process_controller.process_project_assets(
+            project=project,
+            asset_records=[ r for r in asset_records if r.id not in done_asset_ids ],
+            asset_model=asset_model,
+            chunk_model=chunk_model,
+            process_pool=self.app.process_pool,
+            process_manager=self.app.process_manager,
+            chunk_size=job_params.get("chunk_size", 100),
+            overlap_size=job_params.get("overlap_size", 20),
+            do_reset=job_params.get("do_reset", 0),
+            streaming=job_params.get("streaming", 0),
+            chunking_mode=job_params.get("chunking_mode", ChunkingModeEnum.TEXT.value),
+            stream_batch_size=self.app_settings.PROCESS_STREAM_BATCH_SIZE,
+            on_asset_processed=on_asset_processed,
+        )
+
+        for failed_file in process_result["failed_files"]:
+            self.logger.error(f"Error while processing file: {failed_file['file_id']}: {failed_file['error']}")
+
+        is_succeeded = len(done_asset_ids) > 0
+
+        return is_succeeded, {
+            "signal": ResponseSignal.PROCESSING_SUCCESS.value if is_succeeded else ResponseSignal.PROCESSING_FAILED.value,
+            **process_result,
+        }
+
+    async def run_index_push_job(self, job: Job):
+
+        job_params = job.job_params
+
+        project_model = self.app.container.project_model
+        chunk_model = self.app.container.chunk_model
+
+        project = await project_model.get_project_by_id(project_id=job.job_project_id)
+        if project is None:
+            raise ValueError(f"Project not found: {job.job_project_id}")
+
+        # a resumed push neither resets the collection again nor re-pushes what it already indexed
+        push_started_at = job.job_checkpoint.get("push_started_at")
+        is_resumed = push_started_at is not None
+
+        if not is_resumed:
+            push_started_at = datetime.utcnow()
+            _ = await self.job_model.update_job(
+                job_id=job.id,
+                fields={ "job_checkpoint": { "push_started_at": push_started_at } },
+            )
+
+        progress = JobProgress(total_key="chunks_total", done_key="vectors_done", counters={
+            "vectors_done": job.job_progress.get("vectors_done", 0) if is_resumed else 0,
+        })
+
+        async def on_push_started(chunks_count: int):
+            progress.set(chunks_total=progress.counters["vectors_done"] + chunks_count)
+            _ = await self.job_model.update_job(job_id=job.id, fields={ "job_progress": progress.to_dict() })
+
+        async def on_page_indexed(page_chunks: list):
+            progress.increment(vectors_done=len(page_chunks))
+            _ = await self.job_model.update_job(job_id=job.id, fields={ "job_progress": progress.to_dict() })
+
+        nlp_controller = self.app.container.nlp_controller
+
+        is_inserted, push_result = await nlp_controller.push_project_chunks(
+            project=project,
+            chunk_model=chunk_model,
+            mode=job_params.get("mode"),
+            do_reset=job_params.get("do_reset", 0) if not is_resumed else 0,
+            batch_size=self.app_settings.INDEX_PIPELINE_BATCH_SIZE,
+            queue_size=self.app_settings.INDEX_PIPELINE_QUEUE_SIZE,
+            embed_workers=self.app_settings.INDEX_PIPELINE_EMBED_WORKERS,
+            exclude_indexed_since=push_started_at if is_resumed else None,
+            on_push_started=on_push_started,
+            on_page_indexed=on_page_indexed,
+        )
+
+        progress.set(vectors_deleted=push_result["deleted_items_count"])
+        _ = await self.job_model.update_job(job_id=job.id, fields={ "job_progress": progress.to_dict() })
+
+        return is_inserted, {
+            "signal": ResponseSignal.INSERT_INTO_VECTORDB_SUCCESS.value if is_inserted else ResponseSignal.INSERT_INTO_VECTORDB_ERROR.value,
+            **push_result,
+            "embedding_cache": nlp_controller.get_embedding_cache_stats(),
+        }
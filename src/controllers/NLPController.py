@@ -1,108 +1,503 @@
 from .BaseController import BaseController
-from models.db_schemes import Project, DataChunk
+from .ProcessController import ProcessController
+from models.db_schemes import Project
+from models.enums.IndexPushModeEnum import IndexPushModeEnum
 from stores.llm.LLMEnums import DocumentTypeEnum
-from typing import List
+from helpers.pipeline_stats import PipelineStats
+from helpers.embedding_codec import encode_embedding, decode_embedding
+from bson.objectid import ObjectId
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, AsyncIterator, Callable, Awaitable
+import asyncio
+import functools
 import json
+import logging
+import time
+import uuid
 
 class NLPController(BaseController):
 
     def __init__(self, vectordb_client, generation_client, 
-                 embedding_client, template_parser):
+                 embedding_client, template_parser, embedding_cache=None,
+                 embedding_executor=None):
         super().__init__()
 
         self.vectordb_client = vectordb_client
         self.generation_client = generation_client
         self.embedding_client = embedding_client
         self.template_parser = template_parser
+        self.embedding_cache = embedding_cache
+        self.embedding_executor = embedding_executor
+
+        # the local vector db clients are not thread-safe, every call runs on this single thread
+        self.vectordb_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vectordb")
+
+        self.logger = logging.getLogger(__name__)
+
+    def disconnect(self):
+        # lets the running vector db call finish before the client is closed
+        self.vectordb_executor.shutdown(wait=True)
+
+    async def run_vectordb(self, method: Callable, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.vectordb_executor, functools.partial(method, **kwargs)
+        )
 
     def create_collection_name(self, project_id: str):
         return f"collection_{project_id}".strip()
+
+    def get_chunk_vector_id(self, chunk_id: ObjectId):
+        # qdrant point ids must be uuids or integers, pad the 12 bytes object id into a uuid
+        return str(uuid.UUID(bytes=chunk_id.binary + b"\x00" * 4))
+
+    def get_chunk_id_from_vector_id(self, vector_id):
+        try:
+            vector_uuid = uuid.UUID(str(vector_id))
+        except ValueError:
+            return None
+
+        if vector_uuid.bytes[12:] != b"\x00" * 4:
+            return None
+
+        return ObjectId(vector_uuid.bytes[:12])
+
+    def get_index_version(self):
+        # chunks embedded with another backend, model or size have to be indexed again
+        return ":".join([
+            str(self.app_settings.EMBEDDING_BACKEND),
+            str(self.app_settings.EMBEDDING_MODEL_ID),
+            str(self.app_settings.EMBEDDING_MODEL_SIZE),
+        ])
     
-    def reset_vector_db_collection(self, project: Project):
+    async def reset_vector_db_collection(self, project: Project):
         collection_name = self.create_collection_name(project_id=project.project_id)
-        return self.vectordb_client.delete_collection(collection_name=collection_name)
+        return await self.run_vectordb(self.vectordb_client.delete_collection, collection_name=collection_name)
     
-    def get_vector_db_collection_info(self, project: Project):
+    async def ensure_vector_db_collection(self, project: Project, do_reset: bool = False):
+        """Create the project collection unless it exists, True when it was created. Other
+        processes may share the store, so the provider asks it once per call."""
+
+        collection_name = self.create_collection_name(project_id=project.project_id)
+
+        return await self.run_vectordb(
+            self.vectordb_client.create_collection,
+            collection_name=collection_name,
+            embedding_size=self.embedding_client.embedding_size,
+            do_reset=do_reset,
+            collection_config=project.project_collection_config,
+        )
+
+    async def get_vector_db_collection_info(self, project: Project):
         collection_name = self.create_collection_name(project_id=project.project_id)
-        collection_info = self.vectordb_client.get_collection_info(collection_name=collection_name)
+        collection_info = await self.run_vectordb(self.vectordb_client.get_collection_info,
+                                                  collection_name=collection_name)
 
         return json.loads(
             json.dumps(collection_info, default=lambda x: x.__dict__)
         )
     
-    def index_into_vector_db(self, project: Project, chunks: List[DataChunk],
-                                   chunks_ids: List[int], 
-                                   do_reset: bool = False):
-        
-        # step1: get collection name
+    async def embed_texts_with_provider_async(self, texts: List[str], document_type: str):
+
+        # the executor fans batches out under the provider quotas and retries transient errors
+        if self.embedding_executor is not None:
+            return await self.embedding_executor.embed_texts(texts=texts, document_type=document_type)
+
+        return await self.embedding_client.embed_texts_async(texts=texts, document_type=document_type)
+
+    async def embed_texts_async(self, texts: List[str], document_type: str):
+
+        if self.embedding_cache is None:
+            return await self.embed_texts_with_provider_async(texts=texts, document_type=document_type)
+
+        # sqlite reads, writes and evictions stay off the event loop, the cache serializes them
+        vectors = await asyncio.to_thread(self.embedding_cache.get_many, texts=texts, document_type=document_type)
+
+        # embed every distinct missing text only once
+        missing_texts = list(dict.fromkeys(
+            text for text, vector in zip(texts, vectors) if vector is None
+        ))
+
+        if len(missing_texts) == 0:
+            return vectors
+
+        missing_vectors = await self.embed_texts_with_provider_async(texts=missing_texts,
+                                                                     document_type=document_type)
+        if not missing_vectors or len(missing_vectors) != len(missing_texts):
+            return None
+
+        _ = await asyncio.to_thread(self.embedding_cache.set_many, texts=missing_texts,
+                                    vectors=missing_vectors, document_type=document_type)
+
+        embedded = dict(zip(missing_texts, missing_vectors))
+        return [
+            vector if vector is not None else embedded[text]
+            for text, vector in zip(texts, vectors)
+        ]
+
+    def get_embedding_cache_stats(self):
+        if self.embedding_cache is None:
+            return None
+
+        return self.embedding_cache.get_stats()
+
+    async def get_chunks_texts(self, process_controller: ProcessController, page_chunks: List[dict]):
+        texts = [ c.get("chunk_text") for c in page_chunks ]
+
+        # span chunks only hold offsets, their text is read from the source file here
+        spans_positions = [ i for i, text in enumerate(texts) if text is None ]
+        if spans_positions:
+            span_texts = await asyncio.to_thread(
+                process_controller.get_span_texts,
+                spans=[ page_chunks[i]["chunk_metadata"]["chunk_span"] for i in spans_positions ],
+            )
+
+            for i, span_text in zip(spans_positions, span_texts):
+                texts[i] = span_text
+
+        return texts
+
+    async def index_project_pipeline(self, project: Project, pages: AsyncIterator[List[dict]],
+                                           queue_size: int = 4, embed_workers: int = 2,
+                                           on_page_indexed: Callable[[List[dict], list], Awaitable] = None):
+        """Stream pages of raw chunk records (_id, chunk_text, chunk_metadata) through reader ->
+        embedder -> writer stages connected by bounded queues, so Mongo reads, provider calls
+        and vector db writes overlap."""
+
         collection_name = self.create_collection_name(project_id=project.project_id)
+        stats = PipelineStats()
+        inserted_items_count = 0
+
+        embed_queue = asyncio.Queue(maxsize=queue_size)
+        write_queue = asyncio.Queue(maxsize=queue_size)
+
+        process_controller = ProcessController(project_id=project.project_id)
+
+        async def reader():
+            started_at = time.perf_counter()
+
+            async for page_chunks in pages:
+                if not page_chunks:
+                    continue
+
+                chunks_ids = [ self.get_chunk_vector_id(chunk_id=c["_id"]) for c in page_chunks ]
+                texts = await self.get_chunks_texts(process_controller=process_controller, page_chunks=page_chunks)
+
+                stats.record_stage("read", items=len(page_chunks), seconds=time.perf_counter() - started_at)
+
+                stats.record_queue_depth("embed", depth=embed_queue.qsize(), max_size=queue_size)
+                await embed_queue.put((page_chunks, chunks_ids, texts))
+                started_at = time.perf_counter()
+
+            for _ in range(embed_workers):
+                await embed_queue.put(None)
+
+        async def embedder():
+            while (item := await embed_queue.get()) is not None:
+                page_chunks, chunks_ids, texts = item
+                started_at = time.perf_counter()
+
+                vectors = await self.embed_texts_async(texts=texts, document_type=DocumentTypeEnum.DOCUMENT.value)
+
+                if not vectors or len(vectors) != len(texts):
+                    raise RuntimeError(f"Error while embedding {len(texts)} chunks of project: {project.project_id}")
+
+                stats.record_stage("embed", items=len(texts), seconds=time.perf_counter() - started_at)
+
+                stats.record_queue_depth("write", depth=write_queue.qsize(), max_size=queue_size)
+                await write_queue.put((page_chunks, chunks_ids, texts, vectors))
+
+            await write_queue.put(None)
+
+        async def writer():
+            nonlocal inserted_items_count
+            finished_embedders = 0
+
+            while finished_embedders < embed_workers:
+                item = await write_queue.get()
+                if item is None:
+                    finished_embedders += 1
+                    continue
 
-        # step2: manage items
-        texts = [ c.chunk_text for c in chunks ]
-        metadata = [ c.chunk_metadata for c in  chunks]
-        vectors = [
-            self.embedding_client.embed_text(text=text, 
-                                             document_type=DocumentTypeEnum.DOCUMENT.value)
-            for text in texts
+                page_chunks, chunks_ids, texts, vectors = item
+                started_at = time.perf_counter()
+
+                # the vector db client is synchronous, keep it off the event loop
+                is_inserted = await self.run_vectordb(
+                    self.vectordb_client.insert_many,
+                    collection_name=collection_name,
+                    texts=texts,
+                    metadata=[ c["chunk_metadata"] for c in page_chunks ],
+                    vectors=vectors,
+                    record_ids=chunks_ids,
+                )
+
+                if not is_inserted:
+                    raise RuntimeError(f"Error while inserting {len(texts)} vectors into: {collection_name}")
+
+                if on_page_indexed is not None:
+                    await on_page_indexed(page_chunks, vectors)
+
+                inserted_items_count += len(texts)
+                stats.record_stage("write", items=len(texts), seconds=time.perf_counter() - started_at)
+
+        tasks = [
+            asyncio.create_task(reader()),
+            *[ asyncio.create_task(embedder()) for _ in range(embed_workers) ],
+            asyncio.create_task(writer()),
         ]
 
-        # step3: create collection if not exists
-        _ = self.vectordb_client.create_collection(
-            collection_name=collection_name,
-            embedding_size=self.embedding_client.embedding_size,
-            do_reset=do_reset,
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            self.logger.error(f"Index pipeline failed: {e}")
+
+            for task in tasks:
+                task.cancel()
+            _ = await asyncio.gather(*tasks, return_exceptions=True)
+
+            return False, inserted_items_count, stats.to_dict()
+
+        return True, inserted_items_count, stats.to_dict()
+
+    async def restore_stored_vectors(self, project: Project, chunk_model, batch_size: int = 50,
+                                           exclude_indexed_since: datetime = None,
+                                           on_page_indexed: Callable[[List[dict]], Awaitable] = None):
+        """Fill the project collection from the embeddings stored with its chunks, for the
+        current embedding model only. The embedding provider is never called."""
+
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        process_controller = ProcessController(project_id=project.project_id)
+        restored_items_count = 0
+
+        async for page_chunks in chunk_model.iter_project_chunk_records(
+            project_id=project.id,
+            batch_size=batch_size,
+            exclude_indexed_since=exclude_indexed_since,
+            embedding_model=self.get_index_version(),
+            projection=chunk_model.REBUILD_PROJECTION,
+        ):
+            texts = await self.get_chunks_texts(process_controller=process_controller, page_chunks=page_chunks)
+            vectors = [ decode_embedding(c["chunk_embedding"]) for c in page_chunks ]
+
+            is_inserted = await self.run_vectordb(
+                self.vectordb_client.insert_many,
+                collection_name=collection_name,
+                texts=texts,
+                metadata=[ c["chunk_metadata"] for c in page_chunks ],
+                vectors=vectors,
+                record_ids=[ self.get_chunk_vector_id(chunk_id=c["_id"]) for c in page_chunks ],
+            )
+
+            if not is_inserted:
+                self.logger.error(f"Error while restoring {len(texts)} stored vectors into: {collection_name}")
+                return False, restored_items_count
+
+            if on_page_indexed is not None:
+                await on_page_indexed(page_chunks)
+
+            restored_items_count += len(texts)
+
+        return True, restored_items_count
+
+    async def delete_removed_chunks_vectors(self, project: Project, chunk_model, batch_size: int = 1000):
+        """Delete the vectors whose chunk does not exist anymore in the project."""
+
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        vector_ids = await self.run_vectordb(
+            lambda: list(self.vectordb_client.get_all_record_ids(collection_name=collection_name))
         )
 
-        # step4: insert into vector db
-        _ = self.vectordb_client.insert_many(
-            collection_name=collection_name,
-            texts=texts,
-            metadata=metadata,
-            vectors=vectors,
-            record_ids=chunks_ids,
+        deleted_items_count = 0
+        for i in range(0, len(vector_ids), batch_size):
+            batch_vector_ids = vector_ids[i:i+batch_size]
+            batch_chunk_ids = {
+                vector_id: self.get_chunk_id_from_vector_id(vector_id=vector_id)
+                for vector_id in batch_vector_ids
+            }
+
+            existing_chunk_ids = await chunk_model.get_existing_chunk_ids(
+                chunk_ids=[ chunk_id for chunk_id in batch_chunk_ids.values() if chunk_id is not None ]
+            )
+
+            # vectors not derived from a chunk id belong to an older indexing scheme
+            removed_vector_ids = [
+                vector_id
+                for vector_id, chunk_id in batch_chunk_ids.items()
+                if chunk_id is None or chunk_id not in existing_chunk_ids
+            ]
+
+            if len(removed_vector_ids) == 0:
+                continue
+
+            is_deleted = await self.run_vectordb(
+                self.vectordb_client.delete_many,
+                collection_name=collection_name,
+                record_ids=removed_vector_ids,
+            )
+
+            if is_deleted:
+                deleted_items_count += len(removed_vector_ids)
+
+        return deleted_items_count
+
+    async def push_project_chunks(self, project: Project, chunk_model,
+                                        mode: str = IndexPushModeEnum.FULL.value,
+                                        do_reset: bool = False, batch_size: int = 50,
+                                        queue_size: int = 4, embed_workers: int = 2,
+                                        exclude_indexed_since: datetime = None,
+                                        on_push_started: Callable[[int], Awaitable] = None,
+                                        on_page_indexed: Callable[[List[dict]], Awaitable] = None):
+        """Push the project chunks into its collection. full re-indexes every chunk, incremental
+        only chunks not indexed with the current embedding model and rebuild first restores the
+        stored embeddings, then embeds only the chunks that have none."""
+
+        index_version = self.get_index_version()
+
+        # the collection is (re)created once for the whole push, not per page
+        is_created = await self.ensure_vector_db_collection(project=project, do_reset=do_reset)
+
+        # a new collection holds nothing yet, whatever the chunks markers say
+        is_incremental = mode == IndexPushModeEnum.INCREMENTAL.value and not is_created
+        is_rebuild = mode == IndexPushModeEnum.REBUILD.value
+
+        exclude_index_version = index_version if is_incremental else None
+
+        if on_push_started is not None:
+            await on_push_started(await chunk_model.count_project_chunks(
+                project_id=project.id,
+                exclude_index_version=exclude_index_version,
+                exclude_indexed_since=exclude_indexed_since,
+            ))
+
+        async def mark_page_indexed(page_chunks: List[dict], vectors: list = None):
+            embeddings = None
+            if vectors is not None and self.app_settings.EMBEDDING_STORE_VECTORS:
+                embeddings = [
+                    encode_embedding(vector=vector, model=index_version, dtype=self.app_settings.EMBEDDING_STORE_DTYPE)
+                    for vector in vectors
+                ]
+
+            _ = await chunk_model.mark_chunks_indexed(
+                chunk_ids=[ c["_id"] for c in page_chunks ],
+                index_version=index_version,
+                embeddings=embeddings,
+            )
+
+            if on_page_indexed is not None:
+                await on_page_indexed(page_chunks)
+
+        restored_items_count = 0
+        if is_rebuild:
+            is_restored, restored_items_count = await self.restore_stored_vectors(
+                project=project,
+                chunk_model=chunk_model,
+                batch_size=batch_size,
+                exclude_indexed_since=exclude_indexed_since,
+                on_page_indexed=mark_page_indexed,
+            )
+
+            if not is_restored:
+                return False, {
+                    "mode": IndexPushModeEnum.REBUILD.value,
+                    "inserted_items_count": restored_items_count,
+                    "restored_items_count": restored_items_count,
+                    "deleted_items_count": 0,
+                    "pipeline_stats": None,
+                }
+
+        # on rebuild only the chunks without a stored embedding still go through the provider
+        is_inserted, inserted_items_count, pipeline_stats = await self.index_project_pipeline(
+            project=project,
+            pages=chunk_model.iter_project_chunk_records(
+                project_id=project.id,
+                batch_size=batch_size,
+                exclude_index_version=exclude_index_version,
+                exclude_indexed_since=exclude_indexed_since,
+                exclude_embedding_model=index_version if is_rebuild else None,
+                projection=chunk_model.INDEXING_PROJECTION,
+            ),
+            queue_size=queue_size,
+            embed_workers=embed_workers,
+            on_page_indexed=mark_page_indexed,
         )
 
-        return True
+        deleted_items_count = 0
+        if is_inserted and is_incremental:
+            deleted_items_count = await self.delete_removed_chunks_vectors(
+                project=project,
+                chunk_model=chunk_model,
+            )
+
+        if is_rebuild:
+            pushed_mode = IndexPushModeEnum.REBUILD.value
+        elif is_incremental:
+            pushed_mode = IndexPushModeEnum.INCREMENTAL.value
+        else:
+            pushed_mode = IndexPushModeEnum.FULL.value
 
-    def search_vector_db_collection(self, project: Project, text: str, limit: int = 10):
+        return is_inserted, {
+            "mode": pushed_mode,
+            "inserted_items_count": restored_items_count + inserted_items_count,
+            "restored_items_count": restored_items_count,
+            "deleted_items_count": deleted_items_count,
+            "pipeline_stats": pipeline_stats,
+        }
+
+    async def search_vector_db_collection_async(self, project: Project, text: str, limit: int = 10):
 
         # step1: get collection name
         collection_name = self.create_collection_name(project_id=project.project_id)
 
-        # step2: get text embedding vector
-        vector = self.embedding_client.embed_text(text=text, 
-                                                 document_type=DocumentTypeEnum.QUERY.value)
+        # step2: get text embedding vector without blocking the event loop
+        vectors = await self.embed_texts_async(texts=[text], document_type=DocumentTypeEnum.QUERY.value)
 
-        if not vector or len(vector) == 0:
+        if not vectors or not vectors[0]:
             return False
 
+        vector = vectors[0]
+
         # step3: do semantic search
-        results = self.vectordb_client.search_by_vector(
+        results = await self.run_vectordb(
+            self.vectordb_client.search_by_vector,
             collection_name=collection_name,
             vector=vector,
-            limit=limit
+            limit=limit,
+            collection_config=project.project_collection_config,
         )
 
         if not results:
             return False
 
         return results
-    
-    def answer_rag_question(self, project: Project, query: str, limit: int = 10):
-        
-        answer, full_prompt, chat_history = None, None, None
 
-        # step1: retrieve related documents
-        retrieved_documents = self.search_vector_db_collection(
-            project=project,
-            text=query,
+    async def search_vector_db_collection_batch_async(self, project: Project, texts: List[str], limit: int = 10):
+
+        # step1: get collection name
+        collection_name = self.create_collection_name(project_id=project.project_id)
+
+        # step2: embed every query in one call
+        vectors = await self.embed_texts_async(texts=texts, document_type=DocumentTypeEnum.QUERY.value)
+
+        if not vectors or len(vectors) != len(texts):
+            return False
+
+        # step3: search them all in one vector db round-trip
+        results = await self.run_vectordb(
+            self.vectordb_client.search_batch,
+            collection_name=collection_name,
+            vectors=vectors,
             limit=limit,
+            collection_config=project.project_collection_config,
         )
 
-        if not retrieved_documents or len(retrieved_documents) == 0:
-            return answer, full_prompt, chat_history
-        
-        # step2: Construct LLM prompt
+        if results is None:
+            return False
+
+        return results
+
+    def construct_rag_prompt(self, query: str, retrieved_documents: list):
+
         system_prompt = self.template_parser.get("rag", "system_prompt")
 
         documents_prompts = "\n".join([
@@ -117,7 +512,6 @@ class NLPController(BaseController):
             "query": query
         })
 
-        # step3: Construct Generation Client Prompts
         chat_history = [
             self.generation_client.construct_prompt(
                 prompt=system_prompt,
@@ -127,11 +521,32 @@ class NLPController(BaseController):
 
         full_prompt = "\n\n".join([ documents_prompts,  footer_prompt])
 
-        # step4: Retrieve the Answer
-        answer = self.generation_client.generate_text(
+        return full_prompt, chat_history
+    
+    async def answer_rag_question_async(self, project: Project, query: str, limit: int = 10):
+        
+        answer, full_prompt, chat_history = None, None, None
+
+        # step1: retrieve related documents
+        retrieved_documents = await self.search_vector_db_collection_async(
+            project=project,
+            text=query,
+            limit=limit,
+        )
+
+        if not retrieved_documents or len(retrieved_documents) == 0:
+            return answer, full_prompt, chat_history
+        
+        # step2: Construct LLM prompt
+        full_prompt, chat_history = self.construct_rag_prompt(
+            query=query,
+            retrieved_documents=retrieved_documents,
+        )
+
+        # step3: Retrieve the Answer
+        answer = await self.generation_client.generate_text_async(
             prompt=full_prompt,
             chat_history=chat_history
         )
 
         return answer, full_prompt, chat_history
-
@@ -1,18 +1,41 @@
 from .BaseController import BaseController
 from .ProjectController import ProjectController
+from concurrent.futures import Executor, ThreadPoolExecutor
+import asyncio
+import functools
 import os
+import queue
 from langchain_community.document_loaders import TextLoader
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from models import ProcessingEnum
+from langchain_core.documents import Document
+from models import ProcessingEnum, ResponseSignal
+from models.db_schemes import Asset, Project
+from models.enums.ChunkingModeEnum import ChunkingModeEnum
+from helpers.text_spans import iter_text_spans
+from typing import Awaitable, Callable, List
+import fitz
+import gzip
+import hashlib
+import json
 
 class ProcessController(BaseController):
 
+    # bump when the extracted pages format changes, so older cache entries are ignored
+    PARSED_CACHE_VERSION = 1
+
+    # how often a streaming consumer checks that its worker is still alive
+    STREAM_POLL_SECONDS = 1.0
+
     def __init__(self, project_id: str):
         super().__init__()
 
         self.project_id = project_id
         self.project_path = ProjectController().get_project_path(project_id=project_id)
+        self.parsed_cache_path = os.path.join(self.project_path, ".parsed")
+
+        # pages of the file span chunks were last materialised from
+        self.span_source = None
 
     def get_file_extension(self, file_id: str):
         return os.path.splitext(file_id)[-1]
@@ -20,10 +43,7 @@ class ProcessController(BaseController):
     def get_file_loader(self, file_id: str):
 
         file_ext = self.get_file_extension(file_id=file_id)
-        file_path = os.path.join(
-            self.project_path,
-            file_id
-        )
+        file_path = self.get_file_path(file_id=file_id)
 
         if not os.path.exists(file_path):
             return None
@@ -36,13 +56,291 @@ class ProcessController(BaseController):
         
         return None
 
-    def get_file_content(self, file_id: str):
+    def get_file_path(self, file_id: str):
+        return os.path.join(
+            self.project_path,
+            file_id
+        )
+
+    def get_pdf_page_count(self, file_id: str):
+        with fitz.open(self.get_file_path(file_id=file_id)) as doc:
+            return doc.page_count
+
+    def iter_pdf_pages(self, file_id: str, start_page: int=0, end_page: int=None):
+        """Yield the pages of a pdf one by one, with the same text and metadata
+        PyMuPDFLoader produces for the whole document."""
+
+        file_path = self.get_file_path(file_id=file_id)
+
+        with fitz.open(file_path) as doc:
+            doc_metadata = {
+                k: doc.metadata[k]
+                for k in doc.metadata
+                if type(doc.metadata[k]) in [str, int]
+            }
+
+            end_page = len(doc) if end_page is None else min(end_page, len(doc))
+
+            for page_no in range(start_page, end_page):
+                yield Document(
+                    page_content=doc[page_no].get_text(),
+                    metadata=dict(
+                        {
+                            "source": file_path,
+                            "file_path": file_path,
+                            "page": page_no,
+                            "total_pages": len(doc),
+                        },
+                        **doc_metadata,
+                    ),
+                )
+
+    def get_file_hash(self, file_id: str):
+        file_hash = hashlib.sha256()
+
+        with open(self.get_file_path(file_id=file_id), "rb") as f:
+            while block := f.read(self.app_settings.FILE_DEFAULT_CHUNK_SIZE):
+                file_hash.update(block)
+
+        return file_hash.hexdigest()
+
+    def get_loader_version(self):
+        return f"{self.PARSED_CACHE_VERSION}:pymupdf-{fitz.VersionBind}"
+
+    def get_processing_fingerprint(self, file_hash: str, processing_params: dict):
+        # chunks only have to be rebuilt when the content, the parameters or the loader changed
+        fingerprint = json.dumps({
+            "content_hash": file_hash,
+            "loader_version": self.get_loader_version(),
+            "params": processing_params,
+        }, sort_keys=True)
+
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+    def get_parsed_cache_file_path(self, file_id: str, start_page: int=0, end_page: int=None):
+        # page ranges parsed by different workers are cached separately
+        pages_range = f"{start_page}-{end_page if end_page is not None else 'end'}"
+
+        return os.path.join(self.parsed_cache_path, f"{file_id}.{pages_range}.jsonl.gz")
+
+    def iter_parsed_cache(self, cache_file_path: str, file_hash: str):
+        """Yield the cached pages, or nothing at all when the entry was produced
+        from other file content or by another loader version."""
+
+        if not os.path.exists(cache_file_path):
+            return False
+
+        with gzip.open(cache_file_path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+
+            if header.get("content_hash") != file_hash or header.get("loader_version") != self.get_loader_version():
+                return False
+
+            for line in f:
+                record = json.loads(line)
+                yield Document(page_content=record["page_content"], metadata=record["metadata"])
+
+        return True
+
+    def iter_pdf_pages_cached(self, file_id: str, start_page: int=0, end_page: int=None,
+                                    file_hash: str=None):
+
+        file_hash = file_hash if file_hash else self.get_file_hash(file_id=file_id)
+        cache_file_path = self.get_parsed_cache_file_path(file_id=file_id, start_page=start_page,
+                                                          end_page=end_page)
+
+        is_cached = yield from self.iter_parsed_cache(cache_file_path=cache_file_path, file_hash=file_hash)
+        if is_cached:
+            return
+
+        os.makedirs(self.parsed_cache_path, exist_ok=True)
+        temp_file_path = f"{cache_file_path}.{os.getpid()}.tmp"
+
+        # pages are written while they are handed out and the entry only becomes visible once complete
+        try:
+            with gzip.open(temp_file_path, "wt", encoding="utf-8", compresslevel=3) as f:
+                f.write(json.dumps({
+                    "content_hash": file_hash,
+                    "loader_version": self.get_loader_version(),
+                }) + "\n")
+
+                for page in self.iter_pdf_pages(file_id=file_id, start_page=start_page, end_page=end_page):
+                    f.write(json.dumps({
+                        "page_content": page.page_content,
+                        "metadata": page.metadata,
+                    }) + "\n")
+
+                    yield page
+
+            os.replace(temp_file_path, cache_file_path)
+        finally:
+            # a failed or abandoned parse must not leave a partial entry behind
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
+
+    def get_pdf_pages_content(self, file_id: str, start_page: int, end_page: int, file_hash: str=None):
+        return list(self.iter_pdf_pages_cached(file_id=file_id, start_page=start_page, end_page=end_page,
+                                               file_hash=file_hash))
+
+    def iter_text_blocks(self, file_id: str, block_size: int=65536):
+        # text files have no pages, read them as blocks of whole lines instead
+        file_path = self.get_file_path(file_id=file_id)
+
+        with open(file_path, encoding="utf-8") as f:
+            lines = []
+            lines_size = 0
+
+            for line in f:
+                lines.append(line)
+                lines_size += len(line)
+
+                if lines_size >= block_size:
+                    yield Document(page_content="".join(lines), metadata={"source": file_path})
+                    lines = []
+                    lines_size = 0
+
+            if lines:
+                yield Document(page_content="".join(lines), metadata={"source": file_path})
+
+    def iter_file_pages(self, file_id: str, file_hash: str=None):
+
+        file_ext = self.get_file_extension(file_id=file_id)
+
+        if not os.path.exists(self.get_file_path(file_id=file_id)):
+            raise FileNotFoundError(f"File not found: {file_id}")
+
+        if file_ext == ProcessingEnum.TXT.value:
+            return self.iter_text_blocks(file_id=file_id)
+
+        if file_ext == ProcessingEnum.PDF.value:
+            return self.iter_pdf_pages_cached(file_id=file_id, file_hash=file_hash)
+
+        raise ValueError(f"Unsupported file type: {file_id}")
+
+    def get_overlap_text(self, text: str, overlap_size: int):
+        if overlap_size <= 0:
+            return ""
+
+        tail = text[-overlap_size:]
+
+        # do not start the overlap in the middle of a word
+        first_space = tail.find(" ")
+        if 0 <= first_space < len(tail) - 1:
+            tail = tail[first_space+1:]
+
+        return tail.strip()
+
+    def iter_file_chunks(self, file_id: str, chunk_size: int=100, overlap_size: int=20,
+                               file_hash: str=None):
+        """Chunk the file page by page without loading it whole. The tail of every page
+        is carried over to the next one, so chunks also overlap across page boundaries."""
+
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=overlap_size,
+            length_function=len,
+        )
+
+        overlap_text = ""
+        for page in self.iter_file_pages(file_id=file_id, file_hash=file_hash):
+            page_text = " ".join([ overlap_text, page.page_content ]) if overlap_text else page.page_content
+
+            for chunk_text in text_splitter.split_text(page_text):
+                yield chunk_text, page.metadata
+
+            overlap_text = self.get_overlap_text(text=page.page_content, overlap_size=overlap_size)
+
+    def iter_pages_spans(self, pages, file_id: str, chunk_size: int=100, overlap_size: int=20,
+                               first_page_index: int=0, end_page: int=None, file_hash: str=None):
+        """Chunk pages into spans: no chunk text, only the page index and offsets of the chunk
+        in the page, stored under chunk_span in the metadata. The span also keeps the file hash
+        and the page range the pages were parsed as, to read them back from the same cache entry."""
+
+        for page_index, page in enumerate(pages, start=first_page_index):
+            for start, end in iter_text_spans(text=page.page_content, chunk_size=chunk_size,
+                                              overlap_size=overlap_size):
+                yield None, dict(page.metadata, chunk_span={
+                    "file_id": file_id,
+                    "file_hash": file_hash,
+                    "pages_start": first_page_index,
+                    "pages_end": end_page,
+                    "page_index": page_index,
+                    "start": start,
+                    "end": end,
+                })
+
+    def iter_file_spans(self, file_id: str, chunk_size: int=100, overlap_size: int=20, file_hash: str=None):
+        # page indexes refer to iter_file_pages, which materialising the texts reads again
+        return self.iter_pages_spans(
+            pages=self.iter_file_pages(file_id=file_id, file_hash=file_hash),
+            file_id=file_id,
+            chunk_size=chunk_size,
+            overlap_size=overlap_size,
+            file_hash=file_hash,
+        )
+
+    def iter_span_pages(self, span: dict):
+        # pdf pages come from the parsed cache entry of the range the span was cut from,
+        # spans stored before the range was recorded read the whole file
+        if "pages_start" in span and self.get_file_extension(file_id=span["file_id"]) == ProcessingEnum.PDF.value:
+            return self.iter_pdf_pages_cached(
+                file_id=span["file_id"],
+                start_page=span["pages_start"],
+                end_page=span["pages_end"],
+                file_hash=span["file_hash"],
+            )
+
+        return self.iter_file_pages(file_id=span["file_id"], file_hash=span.get("file_hash"))
+
+    def get_span_texts(self, spans: list):
+        """Slice the texts of span chunks out of their source pages. Spans come in chunk
+        order, so the pages of the last file range read are kept for the next spans."""
+
+        texts = []
+
+        for span in spans:
+            source_key = (span["file_id"], span.get("pages_start", 0))
+
+            if self.span_source is None or self.span_source[0] != source_key:
+                self.span_source = (source_key, [
+                    page.page_content
+                    for page in self.iter_span_pages(span=span)
+                ])
+
+            page_content = self.span_source[1][span["page_index"] - source_key[1]]
+            texts.append(page_content[span["start"]:span["end"]])
+
+        return texts
+
+    def iter_file_chunk_batches(self, file_id: str, chunk_size: int=100, overlap_size: int=20,
+                                      batch_size: int=200, file_hash: str=None,
+                                      chunking_mode: str=ChunkingModeEnum.TEXT.value):
+        batch = []
+
+        iter_chunks = self.iter_file_spans if chunking_mode == ChunkingModeEnum.SPAN.value else self.iter_file_chunks
+
+        for chunk in iter_chunks(file_id=file_id, chunk_size=chunk_size, overlap_size=overlap_size,
+                                 file_hash=file_hash):
+            batch.append(chunk)
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def get_file_content(self, file_id: str, file_hash: str=None):
 
         loader = self.get_file_loader(file_id=file_id)
-        if loader:
-            return loader.load()
+        if not loader:
+            return None
 
-        return None
+        # parsing pdfs is the expensive step, serve their pages from the parsed cache when valid
+        if self.get_file_extension(file_id=file_id) == ProcessingEnum.PDF.value:
+            return list(self.iter_pdf_pages_cached(file_id=file_id, file_hash=file_hash))
+
+        return loader.load()
 
     def process_file_content(self, file_content: list, file_id: str,
                             chunk_size: int=100, overlap_size: int=20):
@@ -70,6 +368,389 @@ class ProcessController(BaseController):
 
         return chunks
 
+    async def process_file_in_pool(self, process_pool: Executor, file_id: str,
+                                         chunk_size: int=100, overlap_size: int=20, file_hash: str=None,
+                                         chunking_mode: str=ChunkingModeEnum.TEXT.value):
+        """Parse and chunk the file in a worker process, so CPU bound parsing neither
+        blocks the event loop nor is limited to a single core."""
+
+        loop = asyncio.get_running_loop()
+
+        if self.get_file_extension(file_id=file_id) == ProcessingEnum.PDF.value:
+            # hash once here instead of in every worker validating its parsed cache entry
+            if not file_hash:
+                file_hash = await asyncio.to_thread(self.get_file_hash, file_id=file_id)
+
+            page_count = await asyncio.to_thread(self.get_pdf_page_count, file_id=file_id)
+
+            # big pdfs are split into page ranges parsed by several workers at once
+            if page_count >= self.app_settings.PDF_PARALLEL_MIN_PAGES:
+                pages_per_task = self.app_settings.PDF_PAGES_PER_TASK
+
+                ranges_chunks = await asyncio.gather(*[
+                    loop.run_in_executor(
+                        process_pool,
+                        process_pdf_pages_worker,
+                        self.project_id,
+                        file_id,
+                        start_page,
+                        start_page + pages_per_task,
+                        chunk_size,
+                        overlap_size,
+                        file_hash,
+                        chunking_mode,
+                    )
+                    for start_page in range(0, page_count, pages_per_task)
+                ])
+
+                # gather keeps the ranges order, so chunks stay in document order
+                return [
+                    chunk
+                    for range_chunks in ranges_chunks
+                    for chunk in range_chunks
+                ]
+
+        return await loop.run_in_executor(
+            process_pool,
+            process_file_worker,
+            self.project_id,
+            file_id,
+            chunk_size,
+            overlap_size,
+            file_hash,
+            chunking_mode,
+        )
+
+    def get_process_pool_size(self):
+        # the pool is created with the same setting, None means one worker per core
+        return self.app_settings.PROCESS_POOL_MAX_WORKERS or os.cpu_count() or 1
+
+    async def stream_file_in_pool(self, process_pool: Executor, process_manager, file_id: str,
+                                        chunk_size: int=100, overlap_size: int=20, batch_size: int=200,
+                                        file_hash: str=None, chunking_mode: str=ChunkingModeEnum.TEXT.value,
+                                        stream_executor: Executor=None):
+        """Stream batches of (text, metadata) chunks out of a pool worker as they are produced.
+        The queue between both processes is bounded, so neither side ever holds the whole file.
+        The blocking queue reads run on stream_executor, the default executor when None."""
+
+        loop = asyncio.get_running_loop()
+        batches_queue = process_manager.Queue(maxsize=2)
+        stop_event = process_manager.Event()
+
+        worker = loop.run_in_executor(
+            process_pool,
+            stream_file_worker,
+            self.project_id,
+            file_id,
+            chunk_size,
+            overlap_size,
+            batch_size,
+            batches_queue,
+            stop_event,
+            file_hash,
+            chunking_mode,
+        )
+
+        async def get_batch():
+            # polled, so a worker that dies before its end of stream marker does not hang us
+            while True:
+                try:
+                    return await loop.run_in_executor(
+                        stream_executor,
+                        functools.partial(batches_queue.get, timeout=self.STREAM_POLL_SECONDS),
+                    )
+                except queue.Empty:
+                    if worker.done():
+                        await worker
+                        raise RuntimeError(f"Stream worker of {file_id} exited without ending the stream")
+
+        is_consumed = False
+        try:
+            while (batch := await get_batch()) is not None:
+                yield batch
+
+            is_consumed = True
+        finally:
+            # a consumer stopping early, e.g. a cancelled job, stops the worker after its current
+            # batch and only drops what is already queued, the rest of the file is never parsed
+            if not is_consumed and not worker.done():
+                stop_event.set()
+
+                try:
+                    while True:
+                        _ = await loop.run_in_executor(stream_executor, batches_queue.get_nowait)
+                except Exception:
+                    pass
+
+                # its pool slot is free again before the next stream is let in
+                try:
+                    await worker
+                except Exception:
+                    pass
+
+        # surfaces the worker exception, if any
+        await worker
+
+    async def process_project_assets(self, project: Project, asset_records: List[Asset],
+                                           asset_model, chunk_model,
+                                           process_pool: Executor, process_manager,
+                                           chunk_size: int=100, overlap_size: int=20,
+                                           do_reset: int=0, streaming: int=0, stream_batch_size: int=200,
+                                           chunking_mode: str=ChunkingModeEnum.TEXT.value,
+                                           on_asset_processed: Callable[..., Awaitable]=None):
+        """Chunk the given assets in the pool, replacing the chunks of every processed asset.
+        Assets whose content and parameters did not change since their last run are skipped."""
+
+        no_records = 0
+        no_files = 0
+        no_skipped_files = 0
+        failed_files = []
+
+        # one streamed file per pool worker, each with its own thread reading its queue. Files
+        # waiting for a worker neither hold a queue reader nor starve the default executor
+        streams_count = self.get_process_pool_size()
+        streams_semaphore = asyncio.Semaphore(streams_count)
+        stream_executor = None
+        if streaming == 1:
+            stream_executor = ThreadPoolExecutor(max_workers=streams_count, thread_name_prefix="stream")
+
+        async def replace_asset_chunks(asset_id, file_chunks: list, first_order: int=1):
+            # the previous chunks of the asset are dropped right before its first new batch lands
+            if first_order == 1:
+                _ = await chunk_model.delete_chunks_by_asset_id(asset_id=asset_id, project_id=project.id)
+
+            return await chunk_model.insert_many_chunk_records(
+                records=chunk_model.build_chunk_records(
+                    chunks=file_chunks,
+                    project_id=project.id,
+                    asset_id=asset_id,
+                    first_order=first_order
+                ),
+                batch_size=self.app_settings.CHUNKS_INSERT_BATCH_SIZE,
+                max_in_flight=self.app_settings.CHUNKS_INSERT_MAX_IN_FLIGHT,
+            )
+
+        async def stream_asset(asset_id, file_id, file_hash):
+            # chunks reach mongo in fixed size batches while the worker is still parsing
+            inserted_chunks = 0
 
-    
+            async with streams_semaphore:
+                try:
+                    async for file_chunks in self.stream_file_in_pool(
+                        process_pool=process_pool,
+                        process_manager=process_manager,
+                        file_id=file_id,
+                        chunk_size=chunk_size,
+                        overlap_size=overlap_size,
+                        batch_size=stream_batch_size,
+                        file_hash=file_hash,
+                        chunking_mode=chunking_mode,
+                        stream_executor=stream_executor,
+                    ):
+                        inserted_chunks += await replace_asset_chunks(asset_id=asset_id, file_chunks=file_chunks,
+                                                                      first_order=inserted_chunks+1)
+                except Exception:
+                    # do not leave the chunks of a half streamed file behind
+                    if inserted_chunks > 0:
+                        _ = await chunk_model.delete_chunks_by_asset_id(asset_id=asset_id, project_id=project.id)
+                    raise
 
+            return inserted_chunks
+
+        async def process_asset(asset_record: Asset):
+            asset_id = asset_record.id
+            file_id = asset_record.asset_name
+            asset_config = asset_record.asset_config or {}
+
+            try:
+                file_hash = asset_record.asset_hash
+                if not file_hash:
+                    # assets uploaded before content hashing, hash once and reuse it for the parsed cache
+                    file_hash = await asyncio.to_thread(self.get_file_hash, file_id=file_id)
+
+                processing_params = {
+                    "chunk_size": chunk_size,
+                    "overlap_size": overlap_size,
+                    "streaming": streaming,
+                    "chunking_mode": chunking_mode,
+                }
+
+                processing_fingerprint = self.get_processing_fingerprint(
+                    file_hash=file_hash,
+                    processing_params=processing_params
+                )
+
+                # unchanged content processed with the same parameters already has up to date chunks
+                last_processing = asset_config.get("processing") or {}
+                if do_reset != 1 and last_processing.get("fingerprint") == processing_fingerprint:
+                    return asset_record, 0, True, None
+
+                # forget the previous run first, its chunks are about to be replaced
+                if last_processing:
+                    asset_config.pop("processing")
+                    _ = await asset_model.update_asset_config(asset_id=asset_id, asset_config=asset_config)
+
+                if streaming == 1:
+                    inserted_chunks = await stream_asset(asset_id=asset_id, file_id=file_id, file_hash=file_hash)
+                else:
+                    file_chunks = await self.process_file_in_pool(
+                        process_pool=process_pool,
+                        file_id=file_id,
+                        chunk_size=chunk_size,
+                        overlap_size=overlap_size,
+                        file_hash=file_hash,
+                        chunking_mode=chunking_mode
+                    )
+
+                    inserted_chunks = 0
+                    if file_chunks:
+                        inserted_chunks = await replace_asset_chunks(asset_id=asset_id, file_chunks=file_chunks)
+            except Exception as e:
+                return asset_record, 0, False, str(e)
+
+            if inserted_chunks == 0:
+                return asset_record, 0, False, "no chunks could be extracted from the file"
+
+            asset_config["processing"] = dict(
+                processing_params,
+                fingerprint=processing_fingerprint,
+                content_hash=file_hash,
+                chunks_count=inserted_chunks,
+            )
+
+            _ = await asset_model.update_asset_config(asset_id=asset_id, asset_config=asset_config)
+
+            return asset_record, inserted_chunks, False, None
+
+        try:
+            # every file is reported as soon as its worker finishes
+            for next_processed in asyncio.as_completed([
+                process_asset(asset_record=asset_record)
+                for asset_record in asset_records
+            ]):
+                asset_record, inserted_chunks, is_skipped, error = await next_processed
+
+                if error is not None:
+                    failed_files.append({
+                        "file_id": asset_record.asset_name,
+                        "signal": ResponseSignal.PROCESSING_FAILED.value,
+                        "error": error,
+                    })
+                elif is_skipped:
+                    no_skipped_files += 1
+                else:
+                    no_records += inserted_chunks
+                    no_files += 1
+
+                if on_asset_processed is not None:
+                    await on_asset_processed(asset_record, inserted_chunks, is_skipped, error)
+        finally:
+            if stream_executor is not None:
+                stream_executor.shutdown(wait=False)
+
+        return {
+            "inserted_chunks": no_records,
+            "processed_files": no_files,
+            "skipped_files": no_skipped_files,
+            "failed_files": failed_files,
+        }
+
+
+def process_file_worker(project_id: str, file_id: str, chunk_size: int, overlap_size: int,
+                        file_hash: str=None, chunking_mode: str=ChunkingModeEnum.TEXT.value):
+    # runs inside a pool worker, only plain picklable values travel back to the app
+    process_controller = ProcessController(project_id=project_id)
+
+    if chunking_mode == ChunkingModeEnum.SPAN.value:
+        return list(process_controller.iter_file_spans(
+            file_id=file_id,
+            chunk_size=chunk_size,
+            overlap_size=overlap_size,
+            file_hash=file_hash,
+        ))
+
+    file_content = process_controller.get_file_content(file_id=file_id, file_hash=file_hash)
+    if file_content is None:
+        return None
+
+    file_chunks = process_controller.process_file_content(
+        file_content=file_content,
+        file_id=file_id,
+        chunk_size=chunk_size,
+        overlap_size=overlap_size
+    )
+
+    return [
+        (chunk.page_content, chunk.metadata)
+        for chunk in file_chunks
+    ]
+
+
+def process_pdf_pages_worker(project_id: str, file_id: str, start_page: int, end_page: int,
+                             chunk_size: int, overlap_size: int, file_hash: str=None,
+                             chunking_mode: str=ChunkingModeEnum.TEXT.value):
+    process_controller = ProcessController(project_id=project_id)
+
+    if chunking_mode == ChunkingModeEnum.SPAN.value:
+        return list(process_controller.iter_pages_spans(
+            pages=process_controller.iter_pdf_pages_cached(file_id=file_id, start_page=start_page,
+                                                           end_page=end_page, file_hash=file_hash),
+            file_id=file_id,
+            chunk_size=chunk_size,
+            overlap_size=overlap_size,
+            first_page_index=start_page,
+            end_page=end_page,
+            file_hash=file_hash,
+        ))
+
+    pages_content = process_controller.get_pdf_pages_content(
+        file_id=file_id,
+        start_page=start_page,
+        end_page=end_page,
+        file_hash=file_hash,
+    )
+
+    # the splitter works page by page, so chunking a range matches chunking the whole file
+    file_chunks = process_controller.process_file_content(
+        file_content=pages_content,
+        file_id=file_id,
+        chunk_size=chunk_size,
+        overlap_size=overlap_size
+    )
+
+    return [
+        (chunk.page_content, chunk.metadata)
+        for chunk in file_chunks
+    ]
+
+
+def stream_file_worker(project_id: str, file_id: str, chunk_size: int, overlap_size: int,
+                       batch_size: int, batches_queue, stop_event=None, file_hash: str=None,
+                       chunking_mode: str=ChunkingModeEnum.TEXT.value):
+    process_controller = ProcessController(project_id=project_id)
+
+    def put_batch(batch):
+        # polled, a consumer that stopped reading sets stop_event instead of draining the file
+        while stop_event is None or not stop_event.is_set():
+            try:
+                batches_queue.put(batch, timeout=ProcessController.STREAM_POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    try:
+        for batch in process_controller.iter_file_chunk_batches(
+            file_id=file_id,
+            chunk_size=chunk_size,
+            overlap_size=overlap_size,
+            batch_size=batch_size,
+            file_hash=file_hash,
+            chunking_mode=chunking_mode,
+        ):
+            if not put_batch(batch):
+                break
+    finally:
+        # end of stream marker, also sent when parsing fails
+        _ = put_batch(None)
@@ -2,4 +2,4 @@ from .DataController import DataController
 from .ProjectController import ProjectController
 from .ProcessController import ProcessController
 from .NLPController import NLPController
-
+from .JobController import JobController
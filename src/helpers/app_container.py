@@ -0,0 +1,33 @@
+from helpers.config import Settings
+from models.ProjectModel import ProjectModel
+from models.AssetModel import AssetModel
+from models.ChunkModel import ChunkModel
+from models.JobModel import JobModel
+
+class AppContainer:
+    """The settings, models and NLPController shared by every request, created once in
+    startup_span. Routes get them through the dependencies in routes.dependencies."""
+
+    def __init__(self, settings: Settings, db_client: object, nlp_controller):
+        self.settings = settings
+        self.db_client = db_client
+        self.nlp_controller = nlp_controller
+
+        self.project_model = None
+        self.asset_model = None
+        self.chunk_model = None
+        self.job_model = None
+
+    @classmethod
+    async def create_instance(cls, settings: Settings, db_client: object, nlp_controller):
+        instance = cls(settings=settings, db_client=db_client, nlp_controller=nlp_controller)
+        await instance.init_models()
+        return instance
+
+    async def init_models(self):
+        # every model ensures its indexes here, once per app start instead of once per request.
+        # creating an existing index is a no-op, and indexes added later reach existing collections
+        self.project_model = await ProjectModel.create_instance(db_client=self.db_client)
+        self.asset_model = await AssetModel.create_instance(db_client=self.db_client)
+        self.chunk_model = await ChunkModel.create_instance(db_client=self.db_client)
+        self.job_model = await JobModel.create_instance(db_client=self.db_client)
@@ -0,0 +1,102 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from helpers.config import Settings
+from helpers.app_container import AppContainer
+from stores.llm.LLMProviderFactory import LLMProviderFactory
+from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
+from stores.llm.templates.template_parser import TemplateParser
+from stores.llm.EmbeddingCache import EmbeddingCache
+from stores.llm.EmbeddingExecutor import EmbeddingExecutor
+from controllers.BaseController import BaseController
+from controllers.NLPController import NLPController
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+async def create_app_resources(resources, settings: Settings, with_generation: bool = True):
+    """Create the clients, pools and AppContainer as attributes of `resources`: the FastAPI
+    app in startup_span, a plain namespace in ingest.py. Without generation the generation
+    client and template parser, only needed for answering, are left as None."""
+
+    resources.mongo_conn = AsyncIOMotorClient(settings.MONGODB_URL)
+    resources.db_client = resources.mongo_conn[settings.MONGODB_DATABASE]
+
+    llm_provider_factory = LLMProviderFactory(settings)
+    vectordb_provider_factory = VectorDBProviderFactory(settings)
+
+    # generation client
+    resources.generation_client = None
+    resources.template_parser = None
+    if with_generation:
+        resources.generation_client = llm_provider_factory.create(provider=settings.GENERATION_BACKEND)
+        resources.generation_client.set_generation_model(model_id = settings.GENERATION_MODEL_ID)
+
+        resources.template_parser = TemplateParser(
+            language=settings.PRIMARY_LANG,
+            default_language=settings.DEFAULT_LANG,
+        )
+
+    # embedding client
+    resources.embedding_client = llm_provider_factory.create(provider=settings.EMBEDDING_BACKEND)
+    resources.embedding_client.set_embedding_model(model_id=settings.EMBEDDING_MODEL_ID,
+                                                   embedding_size=settings.EMBEDDING_MODEL_SIZE)
+
+    # embedding executor
+    resources.embedding_executor = EmbeddingExecutor(
+        embedding_client=resources.embedding_client,
+        max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+        requests_per_minute=settings.EMBEDDING_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.EMBEDDING_TOKENS_PER_MINUTE,
+        max_retries=settings.EMBEDDING_MAX_RETRIES,
+    )
+
+    # embedding cache
+    resources.embedding_cache = None
+    if settings.EMBEDDING_CACHE_PATH:
+        resources.embedding_cache = EmbeddingCache(
+            db_path=BaseController().get_database_path(db_name=settings.EMBEDDING_CACHE_PATH),
+            backend=settings.EMBEDDING_BACKEND,
+            model_id=settings.EMBEDDING_MODEL_ID,
+            embedding_size=settings.EMBEDDING_MODEL_SIZE,
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        )
+        resources.embedding_cache.connect()
+
+    # vector db client
+    resources.vectordb_client = vectordb_provider_factory.create(
+        provider=settings.VECTOR_DB_BACKEND
+    )
+    resources.vectordb_client.connect()
+
+    # document parsing pool, spawned workers do not inherit the event loop and client threads
+    resources.process_pool = ProcessPoolExecutor(
+        max_workers=settings.PROCESS_POOL_MAX_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+    # serves the bounded queues chunks are streamed through from the pool workers
+    resources.process_manager = multiprocessing.get_context("spawn").Manager()
+
+    # shared by all requests, the models ensure their indexes once here
+    resources.container = await AppContainer.create_instance(
+        settings=settings,
+        db_client=resources.db_client,
+        nlp_controller=NLPController(
+            vectordb_client=resources.vectordb_client,
+            generation_client=resources.generation_client,
+            embedding_client=resources.embedding_client,
+            template_parser=resources.template_parser,
+            embedding_cache=resources.embedding_cache,
+            embedding_executor=resources.embedding_executor,
+        ),
+    )
+
+    return resources
+
+def close_app_resources(resources):
+    resources.container.nlp_controller.disconnect()
+    resources.mongo_conn.close()
+    resources.vectordb_client.disconnect()
+    resources.process_pool.shutdown(wait=False, cancel_futures=True)
+    resources.process_manager.shutdown()
+
+    if resources.embedding_cache:
+        resources.embedding_cache.disconnect()
@@ -1,4 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Literal, Optional
+from functools import lru_cache
 
 class Settings(BaseSettings):
 
@@ -9,9 +11,19 @@ class Settings(BaseSettings):
     FILE_ALLOWED_TYPES: list
     FILE_MAX_SIZE: int
     FILE_DEFAULT_CHUNK_SIZE: int
+    FILE_DEDUP_ACROSS_PROJECTS: bool = False
+
+    PROCESS_POOL_MAX_WORKERS: Optional[int] = None
+    PDF_PARALLEL_MIN_PAGES: int = 200
+    PDF_PAGES_PER_TASK: int = 100
+    PROCESS_STREAM_BATCH_SIZE: int = 200
 
     MONGODB_URL: str
     MONGODB_DATABASE: str
+    CHUNKS_INSERT_BATCH_SIZE: int = 1000
+    CHUNKS_INSERT_MAX_IN_FLIGHT: int = 4
+    PROJECT_CACHE_MAX_ENTRIES: int = 10000
+    PROJECT_CACHE_TTL_SECONDS: float = 300
 
     GENERATION_BACKEND: str
     EMBEDDING_BACKEND: str
@@ -23,13 +35,45 @@ class Settings(BaseSettings):
     GENERATION_MODEL_ID: str = None
     EMBEDDING_MODEL_ID: str = None
     EMBEDDING_MODEL_SIZE: int = None
+    EMBEDDING_MAX_BATCH_SIZE: Optional[int] = None
+    EMBEDDING_MAX_BATCH_TOKENS: Optional[int] = None
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    EMBEDDING_REQUESTS_PER_MINUTE: Optional[int] = None
+    EMBEDDING_TOKENS_PER_MINUTE: Optional[int] = None
+    EMBEDDING_MAX_RETRIES: int = 5
+    EMBEDDING_CACHE_PATH: Optional[str] = None
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 1000000
     INPUT_DAFAULT_MAX_CHARACTERS: int = None
     GENERATION_DAFAULT_MAX_TOKENS: int = None
     GENERATION_DAFAULT_TEMPERATURE: float = None
 
+    INDEX_PIPELINE_BATCH_SIZE: int = 50
+    INDEX_PIPELINE_QUEUE_SIZE: int = 4
+    INDEX_PIPELINE_EMBED_WORKERS: int = 2
+    EMBEDDING_STORE_VECTORS: bool = False
+    EMBEDDING_STORE_DTYPE: Literal["float16", "float32"] = "float16"
+
+    JOBS_RESUME_ON_STARTUP: bool = True
+    JOBS_LEASE_SECONDS: int = 60
+
     VECTOR_DB_BACKEND : str
     VECTOR_DB_PATH : str
+    VECTOR_DB_URL: Optional[str] = None
+    VECTOR_DB_API_KEY: Optional[str] = None
     VECTOR_DB_DISTANCE_METHOD: str = None
+    VECTOR_DB_INSERT_BATCH_SIZE: int = 256
+    VECTOR_DB_INSERT_PARALLEL: int = 1
+    VECTOR_DB_METADATA_TTL_SECONDS: float = 30
+    VECTOR_DB_QUANTIZATION: str = "none"
+    VECTOR_DB_QUANTIZATION_ALWAYS_RAM: bool = True
+    VECTOR_DB_ON_DISK_VECTORS: bool = False
+    VECTOR_DB_ON_DISK_PAYLOAD: bool = False
+    VECTOR_DB_HNSW_M: Optional[int] = None
+    VECTOR_DB_HNSW_EF_CONSTRUCT: Optional[int] = None
+    VECTOR_DB_SEARCH_RESCORE: bool = True
+    VECTOR_DB_SEARCH_OVERSAMPLING: Optional[float] = None
+    VECTOR_DB_SEARCH_HNSW_EF: Optional[int] = None
+    VECTOR_DB_SEARCH_BATCH_MAX_QUERIES: int = 64
 
     PRIMARY_LANG: str = "en"
     DEFAULT_LANG: str = "en"
@@ -37,5 +81,7 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
 
+@lru_cache
 def get_settings():
+    # .env is read once per process, every caller shares the same Settings
     return Settings()
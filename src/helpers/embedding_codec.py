@@ -0,0 +1,20 @@
+import numpy as np
+
+# little-endian on every platform, the stored bytes are read back wherever the app runs
+EMBEDDING_DTYPES = {
+    "float16": "<f2",
+    "float32": "<f4",
+}
+
+def encode_embedding(vector, model: str, dtype: str = "float16"):
+    """The form an embedding is stored in next to its chunk: the raw vector bytes, tagged
+    with the model that produced them and their dtype."""
+
+    return {
+        "model": model,
+        "dtype": dtype,
+        "vector": np.asarray(vector, dtype=EMBEDDING_DTYPES[dtype]).tobytes(),
+    }
+
+def decode_embedding(embedding: dict):
+    return np.frombuffer(embedding["vector"], dtype=EMBEDDING_DTYPES[embedding["dtype"]]).astype(np.float32)
@@ -0,0 +1,37 @@
+import time
+
+class JobProgress:
+
+    def __init__(self, total_key: str, done_key: str, counters: dict = None):
+        self.started_at = time.perf_counter()
+        self.total_key = total_key
+        self.done_key = done_key
+        self.counters = dict(counters or {})
+
+        # items done by earlier runs of a resumed job do not count towards this run's throughput
+        self.done_at_start = self.counters.get(done_key, 0)
+
+    def set(self, **values):
+        self.counters.update(values)
+
+    def increment(self, **amounts):
+        for key, amount in amounts.items():
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def to_dict(self):
+        elapsed_seconds = time.perf_counter() - self.started_at
+
+        items_total = self.counters.get(self.total_key)
+        items_done = self.counters.get(self.done_key, 0)
+        items_per_second = (items_done - self.done_at_start) / elapsed_seconds if elapsed_seconds else 0.0
+
+        eta_seconds = None
+        if items_total is not None and items_per_second > 0:
+            eta_seconds = round(max(items_total - items_done, 0) / items_per_second, 1)
+
+        return dict(
+            self.counters,
+            elapsed_seconds=round(elapsed_seconds, 3),
+            items_per_second=round(items_per_second, 2),
+            eta_seconds=eta_seconds,
+        )
@@ -0,0 +1,50 @@
+import time
+
+class PipelineStats:
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages = {}
+        self.queues = {}
+
+    def record_stage(self, stage: str, items: int, seconds: float):
+        stats = self.stages.setdefault(stage, {"items": 0, "batches": 0, "busy_seconds": 0.0})
+
+        stats["items"] += items
+        stats["batches"] += 1
+        stats["busy_seconds"] += seconds
+
+    def record_queue_depth(self, queue_name: str, depth: int, max_size: int):
+        stats = self.queues.setdefault(queue_name, {
+            "max_size": max_size, "samples": 0, "depth_sum": 0, "max_depth": 0,
+        })
+
+        stats["samples"] += 1
+        stats["depth_sum"] += depth
+        stats["max_depth"] = max(stats["max_depth"], depth)
+
+    def to_dict(self):
+        elapsed_seconds = time.perf_counter() - self.started_at
+
+        return {
+            "elapsed_seconds": round(elapsed_seconds, 3),
+            "stages": {
+                stage: {
+                    "items": stats["items"],
+                    "batches": stats["batches"],
+                    "busy_seconds": round(stats["busy_seconds"], 3),
+                    # throughput while the stage was working vs over the whole run
+                    "items_per_busy_second": round(stats["items"] / stats["busy_seconds"], 2) if stats["busy_seconds"] else None,
+                    "items_per_second": round(stats["items"] / elapsed_seconds, 2) if elapsed_seconds else None,
+                }
+                for stage, stats in self.stages.items()
+            },
+            "queues": {
+                queue_name: {
+                    "max_size": stats["max_size"],
+                    "max_depth": stats["max_depth"],
+                    "avg_depth": round(stats["depth_sum"] / stats["samples"], 2) if stats["samples"] else 0,
+                }
+                for queue_name, stats in self.queues.items()
+            },
+        }
@@ -0,0 +1,55 @@
+# widest first, like the recursive splitter a chunk ends on the widest separator that fits
+SPAN_SEPARATORS = ["\n\n", "\n", " "]
+
+def iter_text_spans(text: str, chunk_size: int, overlap_size: int = 0):
+    """Yield the (start, end) offsets of chunks of at most chunk_size characters, each
+    starting about overlap_size characters before the previous one ended. Only offsets
+    are produced, the chunk texts are never sliced out of the source text."""
+
+    text_length = len(text)
+
+    start = 0
+    while start < text_length and text[start].isspace():
+        start += 1
+
+    previous_end = 0
+    while start < text_length:
+        end = min(start + chunk_size, text_length)
+        end_separator = None
+
+        # cut on a separator in the second half of the window, past the previous chunk,
+        # so chunks neither shrink to slivers nor consist of the overlap only
+        if end < text_length:
+            min_end = max(start + chunk_size // 2, previous_end + 1)
+
+            for separator in SPAN_SEPARATORS:
+                separator_at = text.rfind(separator, min_end, end)
+                if separator_at >= min_end:
+                    end = separator_at
+                    end_separator = separator
+                    break
+
+        chunk_end = end
+        while chunk_end > start and text[chunk_end - 1].isspace():
+            chunk_end -= 1
+
+        if chunk_end > start:
+            yield start, chunk_end
+
+        if end >= text_length:
+            break
+
+        previous_end = end
+
+        # paragraphs do not overlap, the recursive splitter never merges across them either
+        next_start = end if end_separator == SPAN_SEPARATORS[0] else max(end - overlap_size, start + 1)
+
+        # do not start the overlap in the middle of a word
+        if not text[next_start - 1].isspace():
+            space_at = text.find(" ", next_start, end)
+            next_start = space_at + 1 if space_at >= 0 else end
+
+        while next_start < text_length and text[next_start].isspace():
+            next_start += 1
+
+        start = next_start
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+import time
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire after ttl_seconds. Meant for the
+    event loop thread only, it does no locking."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (expires_at, value), least recently used first
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            _ = self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key):
+        entry = self.entries.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_stats(self):
+        total = self.hits + self.misses
+
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
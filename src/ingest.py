@@ -0,0 +1,243 @@
+"""Bulk ingest a directory or a glob of documents into a project, without the http api.
+
+    $ python ingest.py --project-id 1 /data/docs
+    $ python ingest.py --project-id 1 "/data/docs/**/*.pdf" --chunk-size 500 --overlap-size 50
+
+The files are registered as project assets, chunked in the parsing pool and pushed
+into the vector db. Every step is idempotent: files already registered are recognised
+by their content hash, unchanged assets are not chunked again and only chunks not yet
+indexed are pushed, so an interrupted run is resumed by running the same command again.
+
+The local qdrant storage can only be opened by one process, stop the api server first.
+"""
+
+from helpers.config import get_settings
+from helpers.pipeline_stats import PipelineStats
+from helpers.job_progress import JobProgress
+from helpers.app_resources import create_app_resources, close_app_resources
+from controllers import DataController, ProcessController
+from models.db_schemes import Asset
+from models.enums.AssetTypeEnum import AssetTypeEnum
+from models.enums.IndexPushModeEnum import IndexPushModeEnum
+from models.enums.ChunkingModeEnum import ChunkingModeEnum
+from types import SimpleNamespace
+import argparse
+import asyncio
+import json
+import os
+import time
+
+PROGRESS_REPORT_SECONDS = 5
+
+def report_progress(stage: str, progress: JobProgress, last_report: dict, is_final: bool = False):
+    now = time.monotonic()
+
+    if is_final or now - last_report.get(stage, 0) >= PROGRESS_REPORT_SECONDS:
+        last_report[stage] = now
+        print(f"[{stage}] {json.dumps(progress.to_dict())}", flush=True)
+
+async def register_files(resources, project, source_paths: list, do_link: bool, stats: PipelineStats,
+                         batch_size: int = 100):
+    """Copy the files into the project and create their assets, a batch at a time.
+    Files whose content the project already holds map to the existing asset."""
+
+    data_controller = DataController()
+    asset_model = resources.container.asset_model
+
+    asset_records = {}
+    progress = JobProgress(total_key="files_total", done_key="files_done", counters={
+        "files_total": len(source_paths), "files_done": 0, "files_registered": 0,
+    })
+    last_report = {}
+
+    for i in range(0, len(source_paths), batch_size):
+        started_at = time.perf_counter()
+        batch_paths = source_paths[i:i+batch_size]
+
+        batch_hashes = await asyncio.gather(*[
+            asyncio.to_thread(data_controller.get_file_hash, file_path=source_path)
+            for source_path in batch_paths
+        ])
+
+        existing_assets = {
+            asset.asset_hash: asset
+            for asset in await asset_model.get_assets_by_hashes(
+                asset_project_id=project.id,
+                asset_hashes=list(set(batch_hashes)),
+            )
+        }
+
+        # identical files inside the batch are copied only once
+        new_files = {}
+        for source_path, file_hash in zip(batch_paths, batch_hashes):
+            if file_hash not in existing_assets and file_hash not in new_files:
+                new_files[file_hash] = source_path
+
+        copied_files = await asyncio.gather(*[
+            asyncio.to_thread(data_controller.copy_file_into_project, source_path=source_path,
+                              project_id=project.project_id, do_link=do_link)
+            for source_path in new_files.values()
+        ])
+
+        new_assets = await asset_model.insert_many_assets(assets=[
+            Asset(
+                asset_project_id=project.id,
+                asset_type=AssetTypeEnum.FILE.value,
+                asset_name=file_id,
+                asset_size=os.path.getsize(file_path),
+                asset_hash=file_hash,
+                asset_config={ "source_path": os.path.abspath(source_path) },
+            )
+            for (file_hash, source_path), (file_path, file_id) in zip(new_files.items(), copied_files)
+        ])
+
+        for asset in [ *existing_assets.values(), *new_assets ]:
+            asset_records[asset.id] = asset
+
+        stats.record_stage("register", items=len(batch_paths), seconds=time.perf_counter() - started_at)
+        progress.increment(files_done=len(batch_paths), files_registered=len(new_assets))
+        report_progress(stage="register", progress=progress, last_report=last_report)
+
+    report_progress(stage="register", progress=progress, last_report=last_report, is_final=True)
+
+    return list(asset_records.values())
+
+async def process_assets(resources, project, asset_records: list, args, stats: PipelineStats):
+
+    asset_model = resources.container.asset_model
+    chunk_model = resources.container.chunk_model
+    settings = resources.container.settings
+
+    progress = JobProgress(total_key="files_total", done_key="files_done", counters={
+        "files_total": len(asset_records), "files_done": 0, "files_skipped": 0, "files_failed": 0, "chunks_done": 0,
+    })
+    last_report = {}
+    started_at = time.perf_counter()
+
+    async def on_asset_processed(asset_record, inserted_chunks, is_skipped, error):
+        nonlocal started_at
+
+        progress.increment(
+            files_done=1,
+            files_skipped=1 if is_skipped else 0,
+            files_failed=1 if error is not None else 0,
+            chunks_done=inserted_chunks,
+        )
+
+        if error is not None:
+            source_path = (asset_record.asset_config or {}).get("source_path", asset_record.asset_name)
+            print(f"[process] failed: {source_path}: {error}", flush=True)
+
+        stats.record_stage("process", items=1, seconds=time.perf_counter() - started_at)
+        started_at = time.perf_counter()
+
+        report_progress(stage="process", progress=progress, last_report=last_report)
+
+    process_result = await ProcessController(project_id=project.project_id).process_project_assets(
+        project=project,
+        asset_records=asset_records,
+        asset_model=asset_model,
+        chunk_model=chunk_model,
+        process_pool=resources.process_pool,
+        process_manager=resources.process_manager,
+        chunk_size=args.chunk_size,
+        overlap_size=args.overlap_size,
+        do_reset=1 if args.reset else 0,
+        streaming=1 if args.streaming else 0,
+        chunking_mode=ChunkingModeEnum.SPAN.value if args.spans else ChunkingModeEnum.TEXT.value,
+        stream_batch_size=settings.PROCESS_STREAM_BATCH_SIZE,
+        on_asset_processed=on_asset_processed,
+    )
+
+    report_progress(stage="process", progress=progress, last_report=last_report, is_final=True)
+
+    return process_result
+
+async def push_chunks(resources, project, args):
+
+    chunk_model = resources.container.chunk_model
+    settings = resources.container.settings
+    nlp_controller = resources.container.nlp_controller
+
+    progress = JobProgress(total_key="chunks_total", done_key="vectors_done", counters={ "vectors_done": 0 })
+    last_report = {}
+
+    async def on_push_started(chunks_count: int):
+        progress.set(chunks_total=chunks_count)
+        report_progress(stage="push", progress=progress, last_report=last_report, is_final=True)
+
+    async def on_page_indexed(page_chunks: list):
+        progress.increment(vectors_done=len(page_chunks))
+        report_progress(stage="push", progress=progress, last_report=last_report)
+
+    # incremental pushes only what earlier runs did not index yet
+    is_inserted, push_result = await nlp_controller.push_project_chunks(
+        project=project,
+        chunk_model=chunk_model,
+        mode=IndexPushModeEnum.FULL.value if args.reset else IndexPushModeEnum.INCREMENTAL.value,
+        do_reset=args.reset,
+        batch_size=settings.INDEX_PIPELINE_BATCH_SIZE,
+        queue_size=settings.INDEX_PIPELINE_QUEUE_SIZE,
+        embed_workers=settings.INDEX_PIPELINE_EMBED_WORKERS,
+        on_push_started=on_push_started,
+        on_page_indexed=on_page_indexed,
+    )
+
+    report_progress(stage="push", progress=progress, last_report=last_report, is_final=True)
+
+    return is_inserted, dict(push_result, embedding_cache=nlp_controller.get_embedding_cache_stats())
+
+async def ingest(args):
+
+    settings = get_settings()
+    # the same clients the api creates on startup, minus everything only answering needs
+    resources = await create_app_resources(resources=SimpleNamespace(), settings=settings, with_generation=False)
+    stats = PipelineStats()
+
+    try:
+        project = await resources.container.project_model.get_project_or_create_one(project_id=args.project_id)
+
+        source_paths = list(DataController().iter_source_files(source=args.source))
+        print(f"[ingest] {len(source_paths)} files found in: {args.source}", flush=True)
+
+        if len(source_paths) == 0:
+            return False
+
+        asset_records = await register_files(resources=resources, project=project, source_paths=source_paths,
+                                             do_link=args.link, stats=stats)
+
+        process_result = await process_assets(resources=resources, project=project,
+                                              asset_records=asset_records, args=args, stats=stats)
+
+        is_inserted, push_result = True, None
+        if not args.skip_push:
+            is_inserted, push_result = await push_chunks(resources=resources, project=project, args=args)
+
+        print(json.dumps({
+            "process": dict(process_result, failed_files=len(process_result["failed_files"])),
+            "push": push_result,
+            "stages": stats.to_dict()["stages"],
+        }, indent=2), flush=True)
+
+        return is_inserted and len(process_result["failed_files"]) == 0
+    finally:
+        close_app_resources(resources=resources)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk ingest documents into a project.")
+
+    parser.add_argument("source", help="a directory, searched recursively, or a glob pattern")
+    parser.add_argument("--project-id", required=True)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--overlap-size", type=int, default=20)
+    parser.add_argument("--streaming", action="store_true", help="stream the chunks of big files into mongo")
+    parser.add_argument("--spans", action="store_true", help="store chunk offsets instead of chunk texts")
+    parser.add_argument("--link", action="store_true", help="hard link the files into the project instead of copying")
+    parser.add_argument("--reset", action="store_true", help="rechunk every file and rebuild the collection")
+    parser.add_argument("--skip-push", action="store_true", help="stop after chunking")
+
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    is_succeeded = asyncio.run(ingest(args=parse_args()))
+    raise SystemExit(0 if is_succeeded else 1)
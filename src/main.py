@@ -1,45 +1,26 @@
 from fastapi import FastAPI
-from routes import base, data, nlp
-from motor.motor_asyncio import AsyncIOMotorClient
+from routes import base, data, nlp, jobs
 from helpers.config import get_settings
-from stores.llm.LLMProviderFactory import LLMProviderFactory
-from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
-from stores.llm.templates.template_parser import TemplateParser
+from helpers.app_resources import create_app_resources, close_app_resources
+from controllers.JobController import JobController
 
 app = FastAPI()
 
 async def startup_span():
     settings = get_settings()
-    app.mongo_conn = AsyncIOMotorClient(settings.MONGODB_URL)
-    app.db_client = app.mongo_conn[settings.MONGODB_DATABASE]
+    await create_app_resources(resources=app, settings=settings)
 
-    llm_provider_factory = LLMProviderFactory(settings)
-    vectordb_provider_factory = VectorDBProviderFactory(settings)
+    # background process and index push jobs, interrupted ones continue from their checkpoint
+    app.job_controller = JobController(app=app)
+    await app.job_controller.connect()
 
-    # generation client
-    app.generation_client = llm_provider_factory.create(provider=settings.GENERATION_BACKEND)
-    app.generation_client.set_generation_model(model_id = settings.GENERATION_MODEL_ID)
-
-    # embedding client
-    app.embedding_client = llm_provider_factory.create(provider=settings.EMBEDDING_BACKEND)
-    app.embedding_client.set_embedding_model(model_id=settings.EMBEDDING_MODEL_ID,
-                                             embedding_size=settings.EMBEDDING_MODEL_SIZE)
-    
-    # vector db client
-    app.vectordb_client = vectordb_provider_factory.create(
-        provider=settings.VECTOR_DB_BACKEND
-    )
-    app.vectordb_client.connect()
-
-    app.template_parser = TemplateParser(
-        language=settings.PRIMARY_LANG,
-        default_language=settings.DEFAULT_LANG,
-    )
+    if settings.JOBS_RESUME_ON_STARTUP:
+        _ = await app.job_controller.resume_interrupted_jobs()
 
 
 async def shutdown_span():
-    app.mongo_conn.close()
-    app.vectordb_client.disconnect()
+    await app.job_controller.disconnect()
+    close_app_resources(resources=app)
 
 app.on_event("startup")(startup_span)
 app.on_event("shutdown")(shutdown_span)
@@ -47,3 +28,4 @@ app.on_event("shutdown")(shutdown_span)
 app.include_router(base.base_router)
 app.include_router(data.data_router)
 app.include_router(nlp.nlp_router)
+app.include_router(jobs.jobs_router)
@@ -16,16 +16,14 @@ class AssetModel(BaseDataModel):
         return instance
 
     async def init_collection(self):
-        all_collections = await self.db_client.list_collection_names()
-        if DataBaseEnum.COLLECTION_ASSET_NAME.value not in all_collections:
-            self.collection = self.db_client[DataBaseEnum.COLLECTION_ASSET_NAME.value]
-            indexes = Asset.get_indexes()
-            for index in indexes:
-                await self.collection.create_index(
-                    index["key"],
-                    name=index["name"],
-                    unique=index["unique"]
-                )
+        indexes = Asset.get_indexes()
+        for index in indexes:
+            await self.collection.create_index(
+                index["key"],
+                name=index["name"],
+                unique=index["unique"],
+                **({"partialFilterExpression": index["partial_filter"]} if "partial_filter" in index else {})
+            )
 
     async def create_asset(self, asset: Asset):
 
@@ -34,6 +32,33 @@ class AssetModel(BaseDataModel):
 
         return asset
 
+    async def insert_many_assets(self, assets: list):
+
+        if len(assets) == 0:
+            return assets
+
+        result = await self.collection.insert_many([
+            asset.dict(by_alias=True, exclude_unset=True)
+            for asset in assets
+        ])
+
+        for asset, inserted_id in zip(assets, result.inserted_ids):
+            asset.id = inserted_id
+
+        return assets
+
+    async def get_assets_by_hashes(self, asset_project_id: str, asset_hashes: list):
+
+        records = await self.collection.find({
+            "asset_project_id": ObjectId(asset_project_id) if isinstance(asset_project_id, str) else asset_project_id,
+            "asset_hash": {"$in": asset_hashes},
+        }).to_list(length=None)
+
+        return [
+            Asset(**record)
+            for record in records
+        ]
+
     async def get_all_project_assets(self, asset_project_id: str, asset_type: str):
 
         records = await self.collection.find({
@@ -58,5 +83,28 @@ class AssetModel(BaseDataModel):
         
         return None
 
+    async def get_asset_record_by_hash(self, asset_project_id: str, asset_hash: str):
+
+        record = await self.collection.find_one({
+            "asset_project_id": ObjectId(asset_project_id) if isinstance(asset_project_id, str) else asset_project_id,
+            "asset_hash": asset_hash,
+        })
+
+        if record:
+            return Asset(**record)
+
+        return None
+
+    async def update_asset_config(self, asset_id: ObjectId, asset_config: dict):
+        result = await self.collection.update_one(
+            {
+                "_id": asset_id
+            },
+            {
+                "$set": {
+                    "asset_config": asset_config
+                }
+            }
+        )
 
-    
+        return result.modified_count
@@ -2,10 +2,17 @@ from .BaseDataModel import BaseDataModel
 from .db_schemes import DataChunk
 from .enums.DataBaseEnum import DataBaseEnum
 from bson.objectid import ObjectId
-from pymongo import InsertOne
+from pymongo import InsertOne, UpdateOne
+from datetime import datetime
+import asyncio
 
 class ChunkModel(BaseDataModel):
 
+    # the only fields the indexing pipeline needs from a chunk
+    INDEXING_PROJECTION = {"_id": 1, "chunk_text": 1, "chunk_metadata": 1}
+    # plus the stored embedding, when the vector db is filled without embedding again
+    REBUILD_PROJECTION = {"_id": 1, "chunk_text": 1, "chunk_metadata": 1, "chunk_embedding": 1}
+
     def __init__(self, db_client: object):
         super().__init__(db_client=db_client)
         self.collection = self.db_client[DataBaseEnum.COLLECTION_CHUNK_NAME.value]
@@ -17,16 +24,13 @@ class ChunkModel(BaseDataModel):
         return instance
 
     async def init_collection(self):
-        all_collections = await self.db_client.list_collection_names()
-        if DataBaseEnum.COLLECTION_CHUNK_NAME.value not in all_collections:
-            self.collection = self.db_client[DataBaseEnum.COLLECTION_CHUNK_NAME.value]
-            indexes = DataChunk.get_indexes()
-            for index in indexes:
-                await self.collection.create_index(
-                    index["key"],
-                    name=index["name"],
-                    unique=index["unique"]
-                )
+        indexes = DataChunk.get_indexes()
+        for index in indexes:
+            await self.collection.create_index(
+                index["key"],
+                name=index["name"],
+                unique=index["unique"]
+            )
 
     async def create_chunk(self, chunk: DataChunk):
         result = await self.collection.insert_one(chunk.dict(by_alias=True, exclude_unset=True))
@@ -57,6 +61,45 @@ class ChunkModel(BaseDataModel):
         
         return len(chunks)
 
+    @staticmethod
+    def build_chunk_records(chunks: list, project_id: ObjectId, asset_id: ObjectId, first_order: int=1):
+        """Raw chunk documents of one asset from (chunk_text, chunk_metadata) pairs, built
+        without a DataChunk per chunk."""
+
+        return [
+            {
+                "chunk_text": chunk_text,
+                "chunk_metadata": chunk_metadata,
+                "chunk_order": first_order+i,
+                "chunk_project_id": project_id,
+                "chunk_asset_id": asset_id,
+            }
+            for i, (chunk_text, chunk_metadata) in enumerate(chunks)
+        ]
+
+    async def insert_many_chunk_records(self, records: list, batch_size: int=1000, max_in_flight: int=4):
+        """Insert raw chunk documents, e.g. from build_chunk_records, without going through
+        pydantic. Batches are unordered and up to max_in_flight of them are sent at once."""
+
+        semaphore = asyncio.Semaphore(max(1, max_in_flight))
+
+        async def insert_batch(batch: list):
+            async with semaphore:
+                result = await self.collection.insert_many(batch, ordered=False)
+                return len(result.inserted_ids)
+
+        # let every batch settle before raising, so callers can clean up what landed
+        results = await asyncio.gather(
+            *[ insert_batch(records[i:i+batch_size]) for i in range(0, len(records), batch_size) ],
+            return_exceptions=True
+        )
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        return sum(results)
+
     async def delete_chunks_by_project_id(self, project_id: ObjectId):
         result = await self.collection.delete_many({
             "chunk_project_id": project_id
@@ -64,15 +107,139 @@ class ChunkModel(BaseDataModel):
 
         return result.deleted_count
     
-    async def get_poject_chunks(self, project_id: ObjectId, page_no: int=1, page_size: int=50):
-        records = await self.collection.find({
-                    "chunk_project_id": project_id
-                }).skip(
-                    (page_no-1) * page_size
-                ).limit(page_size).to_list(length=None)
+    async def delete_chunks_by_asset_id(self, asset_id: ObjectId, project_id: ObjectId=None):
+        query = {
+            "chunk_asset_id": asset_id
+        }
 
-        return [
-            DataChunk(**record)
-            for record in records
-        ]
+        # scoping by project lets the (chunk_project_id, chunk_asset_id, chunk_order) index serve the delete
+        if project_id is not None:
+            query["chunk_project_id"] = project_id
+
+        result = await self.collection.delete_many(query)
+
+        return result.deleted_count
+    
+    def get_project_chunks_query(self, project_id: ObjectId, exclude_index_version: str=None,
+                                       exclude_indexed_since: datetime=None, embedding_model: str=None,
+                                       exclude_embedding_model: str=None):
+        query = {
+            "chunk_project_id": project_id
+        }
+
+        # only chunks never indexed with this version, e.g. new chunks or a changed embedding model
+        if exclude_index_version is not None:
+            query["chunk_index_version"] = {"$ne": exclude_index_version}
+
+        # only chunks not indexed yet by a push that started at this time, e.g. when resuming it
+        if exclude_indexed_since is not None:
+            query["chunk_indexed_at"] = {"$not": {"$gte": exclude_indexed_since}}
 
+        # only chunks with, or without, an embedding of this model stored
+        if embedding_model is not None:
+            query["chunk_embedding.model"] = embedding_model
+        elif exclude_embedding_model is not None:
+            query["chunk_embedding.model"] = {"$ne": exclude_embedding_model}
+
+        return query
+
+    async def count_project_chunks(self, project_id: ObjectId, exclude_index_version: str=None,
+                                         exclude_indexed_since: datetime=None, embedding_model: str=None,
+                                         exclude_embedding_model: str=None):
+        return await self.collection.count_documents(
+            self.get_project_chunks_query(
+                project_id=project_id,
+                exclude_index_version=exclude_index_version,
+                exclude_indexed_since=exclude_indexed_since,
+                embedding_model=embedding_model,
+                exclude_embedding_model=exclude_embedding_model,
+            )
+        )
+
+    async def iter_project_chunk_records(self, project_id: ObjectId, batch_size: int=50, after_id: ObjectId=None,
+                                               exclude_index_version: str=None, exclude_indexed_since: datetime=None,
+                                               embedding_model: str=None, exclude_embedding_model: str=None,
+                                               projection: dict=None):
+        """Walk the project chunks in _id order, one batch of raw documents at a time. Every batch
+        is a range query on (chunk_project_id, _id), so late batches cost the same as early ones.
+        With a projection, e.g. INDEXING_PROJECTION, only those fields leave the server."""
+
+        last_id = after_id
+
+        while True:
+            query = self.get_project_chunks_query(
+                project_id=project_id,
+                exclude_index_version=exclude_index_version,
+                exclude_indexed_since=exclude_indexed_since,
+                embedding_model=embedding_model,
+                exclude_embedding_model=exclude_embedding_model,
+            )
+
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+
+            records = await self.collection.find(query, projection).sort("_id", 1).limit(batch_size).to_list(length=None)
+
+            if len(records) == 0:
+                break
+
+            yield records
+
+            if len(records) < batch_size:
+                break
+
+            last_id = records[-1]["_id"]
+
+    async def iter_project_chunks(self, project_id: ObjectId, batch_size: int=50, after_id: ObjectId=None,
+                                        exclude_index_version: str=None, exclude_indexed_since: datetime=None):
+        async for records in self.iter_project_chunk_records(
+            project_id=project_id,
+            batch_size=batch_size,
+            after_id=after_id,
+            exclude_index_version=exclude_index_version,
+            exclude_indexed_since=exclude_indexed_since,
+        ):
+            yield [
+                DataChunk(**record)
+                for record in records
+            ]
+
+    async def mark_chunks_indexed(self, chunk_ids: list, index_version: str, embeddings: list=None):
+        indexed_fields = {
+            "chunk_index_version": index_version,
+            "chunk_indexed_at": datetime.utcnow(),
+        }
+
+        if embeddings is None:
+            result = await self.collection.update_many(
+                {
+                    "_id": {"$in": chunk_ids}
+                },
+                {
+                    "$set": indexed_fields
+                }
+            )
+
+            return result.modified_count
+
+        # every chunk keeps its own embedding, one update each in a single unordered round-trip
+        result = await self.collection.bulk_write([
+            UpdateOne(
+                {"_id": chunk_id},
+                {"$set": dict(indexed_fields, chunk_embedding=embedding)}
+            )
+            for chunk_id, embedding in zip(chunk_ids, embeddings)
+        ], ordered=False)
+
+        return result.modified_count
+
+    async def get_existing_chunk_ids(self, chunk_ids: list):
+        records = await self.collection.find(
+            {"_id": {"$in": chunk_ids}},
+            {"_id": 1},
+        ).to_list(length=None)
+
+        return set(
+            record["_id"]
+            for record in records
+        )
@@ -0,0 +1,147 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemes import Job
+from .enums.DataBaseEnum import DataBaseEnum
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime, timedelta
+
+class JobModel(BaseDataModel):
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client=db_client)
+        self.collection = self.db_client[DataBaseEnum.COLLECTION_JOB_NAME.value]
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        instance = cls(db_client)
+        await instance.init_collection()
+        return instance
+
+    async def init_collection(self):
+        indexes = Job.get_indexes()
+        for index in indexes:
+            await self.collection.create_index(
+                index["key"],
+                name=index["name"],
+                unique=index["unique"]
+            )
+
+    async def create_job(self, job: Job):
+
+        result = await self.collection.insert_one(job.dict(by_alias=True, exclude_unset=True))
+        job.id = result.inserted_id
+
+        return job
+
+    async def get_job(self, job_id: str):
+
+        try:
+            job_id = ObjectId(job_id) if isinstance(job_id, str) else job_id
+        except InvalidId:
+            return None
+
+        record = await self.collection.find_one({
+            "_id": job_id
+        })
+
+        if record:
+            return Job(**record)
+
+        return None
+
+    async def get_project_jobs(self, project_id: ObjectId, limit: int=20):
+
+        records = await self.collection.find({
+            "job_project_id": project_id
+        }).sort("job_created_at", -1).limit(limit).to_list(length=None)
+
+        return [
+            Job(**record)
+            for record in records
+        ]
+
+    async def get_jobs_by_status(self, job_statuses: list):
+
+        records = await self.collection.find({
+            "job_status": {"$in": job_statuses}
+        }).sort("job_created_at", 1).to_list(length=None)
+
+        return [
+            Job(**record)
+            for record in records
+        ]
+
+    async def update_job(self, job_id: ObjectId, fields: dict, from_statuses: list=None,
+                               job_owner: str=None):
+        """Set the given fields, optionally only while the job is still in one of
+        from_statuses and held by job_owner, and return whether the job was updated."""
+
+        query = {
+            "_id": job_id
+        }
+
+        if from_statuses is not None:
+            query["job_status"] = {"$in": from_statuses}
+
+        if job_owner is not None:
+            query["job_owner"] = job_owner
+
+        result = await self.collection.update_one(query, {
+            "$set": dict(fields, job_updated_at=datetime.utcnow())
+        })
+
+        return result.matched_count > 0
+
+    async def claim_job(self, job_id: ObjectId, job_owner: str, lease_seconds: float,
+                              fields: dict=None, from_statuses: list=None):
+        """Take the job for job_owner, in the same atomic update as the given fields, unless
+        another owner still holds a live lease on it. Return whether the job was claimed."""
+
+        now = datetime.utcnow()
+
+        query = {
+            "_id": job_id,
+            "$or": [
+                {"job_owner": None},
+                {"job_owner": job_owner},
+                {"job_lease_expires_at": {"$lt": now}},
+            ],
+        }
+
+        if from_statuses is not None:
+            query["job_status"] = {"$in": from_statuses}
+
+        result = await self.collection.update_one(query, {
+            "$set": dict(
+                fields or {},
+                job_owner=job_owner,
+                job_lease_expires_at=now + timedelta(seconds=lease_seconds),
+                job_updated_at=now,
+            )
+        })
+
+        return result.matched_count > 0
+
+    async def renew_job_lease(self, job_id: ObjectId, job_owner: str, lease_seconds: float, job_statuses: list):
+        """Extend the lease of a job job_owner still holds in one of job_statuses, False once
+        the job was finished, cancelled or taken over elsewhere."""
+
+        result = await self.collection.update_one({
+            "_id": job_id,
+            "job_owner": job_owner,
+            "job_status": {"$in": job_statuses},
+        }, {
+            "$set": { "job_lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds) }
+        })
+
+        return result.matched_count > 0
+
+    async def release_job_leases(self, job_owner: str):
+
+        result = await self.collection.update_many({
+            "job_owner": job_owner
+        }, {
+            "$set": { "job_owner": None, "job_lease_expires_at": None }
+        })
+
+        return result.modified_count
@@ -1,6 +1,10 @@
 from .BaseDataModel import BaseDataModel
 from .db_schemes import Project
 from .enums.DataBaseEnum import DataBaseEnum
+from helpers.ttl_cache import TTLCache
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 class ProjectModel(BaseDataModel):
 
@@ -8,6 +12,12 @@ class ProjectModel(BaseDataModel):
         super().__init__(db_client=db_client)
         self.collection = self.db_client[DataBaseEnum.COLLECTION_PROJECT_NAME.value]
 
+        # project_id -> Project, every endpoint resolves its project first
+        self.project_cache = TTLCache(
+            max_entries=self.app_settings.PROJECT_CACHE_MAX_ENTRIES,
+            ttl_seconds=self.app_settings.PROJECT_CACHE_TTL_SECONDS,
+        )
+
     @classmethod
     async def create_instance(cls, db_client: object):
         instance = cls(db_client)
@@ -15,16 +25,13 @@ class ProjectModel(BaseDataModel):
         return instance
 
     async def init_collection(self):
-        all_collections = await self.db_client.list_collection_names()
-        if DataBaseEnum.COLLECTION_PROJECT_NAME.value not in all_collections:
-            self.collection = self.db_client[DataBaseEnum.COLLECTION_PROJECT_NAME.value]
-            indexes = Project.get_indexes()
-            for index in indexes:
-                await self.collection.create_index(
-                    index["key"],
-                    name=index["name"],
-                    unique=index["unique"]
-                )
+        indexes = Project.get_indexes()
+        for index in indexes:
+            await self.collection.create_index(
+                index["key"],
+                name=index["name"],
+                unique=index["unique"]
+            )
 
 
     async def create_project(self, project: Project):
@@ -36,17 +43,56 @@ class ProjectModel(BaseDataModel):
 
     async def get_project_or_create_one(self, project_id: str):
 
+        project = self.project_cache.get(project_id)
+        if project is not None:
+            return project
+
+        # validates the project_id before anything is written
+        project = Project(project_id=project_id)
+
+        # a single atomic upsert, concurrent first requests all end up with the same project
+        try:
+            record = await self.upsert_project(project=project)
+        except DuplicateKeyError:
+            # two upserts raced on the unique index, the project exists now
+            record = await self.upsert_project(project=project)
+
+        project = Project(**record)
+        self.project_cache.set(project_id, project)
+
+        return project
+
+    async def upsert_project(self, project: Project):
+        return await self.collection.find_one_and_update(
+            {"project_id": project.project_id},
+            {"$setOnInsert": project.dict(by_alias=True, exclude_unset=True)},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def update_project_collection_config(self, project: Project, collection_config: dict):
+        _ = await self.collection.update_one(
+            {"_id": project.id},
+            {"$set": {"project_collection_config": collection_config}}
+        )
+
+        project.project_collection_config = collection_config
+        self.project_cache.set(project.project_id, project)
+
+        return project
+
+    def get_project_cache_stats(self):
+        return self.project_cache.get_stats()
+
+    async def get_project_by_id(self, project_id: ObjectId):
+
         record = await self.collection.find_one({
-            "project_id": project_id
+            "_id": project_id
         })
 
         if record is None:
-            # create new project
-            project = Project(project_id=project_id)
-            project = await self.create_project(project=project)
+            return None
 
-            return project
-        
         return Project(**record)
 
     async def get_all_projects(self, page: int=1, page_size: int=10):
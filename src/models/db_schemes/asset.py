@@ -9,6 +9,7 @@ class Asset(BaseModel):
     asset_type: str = Field(..., min_length=1)
     asset_name: str = Field(..., min_length=1)
     asset_size: int = Field(ge=0, default=None)
+    asset_hash: Optional[str] = Field(default=None)
     asset_config: dict = Field(default=None)
     asset_pushed_at: datetime = Field(default=datetime.utcnow)
 
@@ -34,4 +35,14 @@ class Asset(BaseModel):
                 "name": "asset_project_id_name_index_1",
                 "unique": True
             },
+            {
+                "key": [
+                    ("asset_project_id", 1),
+                    ("asset_hash", 1)
+                ],
+                "name": "asset_project_id_hash_index_1",
+                "unique": True,
+                # assets uploaded before hashing was introduced have no hash
+                "partial_filter": {"asset_hash": {"$type": "string"}}
+            },
         ]
\ No newline at end of file
@@ -1,14 +1,20 @@
 from pydantic import BaseModel, Field, validator
 from typing import Optional
 from bson.objectid import ObjectId
+from datetime import datetime
 
 class DataChunk(BaseModel):
     id: Optional[ObjectId] = Field(None, alias="_id")
-    chunk_text: str = Field(..., min_length=1)
+    # None for span chunks, their text is sliced out of the source file when needed
+    chunk_text: Optional[str] = Field(None, min_length=1)
     chunk_metadata: dict
     chunk_order: int = Field(..., gt=0)
     chunk_project_id: ObjectId
     chunk_asset_id: ObjectId
+    chunk_index_version: Optional[str] = None
+    chunk_indexed_at: Optional[datetime] = None
+    # {model, dtype, vector bytes}, see helpers.embedding_codec
+    chunk_embedding: Optional[dict] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -22,6 +28,23 @@ class DataChunk(BaseModel):
                 ],
                 "name": "chunk_project_id_index_1",
                 "unique": False
+            },
+            {
+                "key": [
+                    ("chunk_project_id", 1),
+                    ("_id", 1)
+                ],
+                "name": "chunk_project_id_id_index_1",
+                "unique": False
+            },
+            {
+                "key": [
+                    ("chunk_project_id", 1),
+                    ("chunk_asset_id", 1),
+                    ("chunk_order", 1)
+                ],
+                "name": "chunk_project_id_asset_id_order_index_1",
+                "unique": False
             }
         ]
     
@@ -5,6 +5,8 @@ from bson.objectid import ObjectId
 class Project(BaseModel):
     id: Optional[ObjectId] = Field(None, alias="_id")
     project_id: str = Field(..., min_length=1)
+    # overrides of the vector db collection settings, see routes.schemes.nlp.CollectionConfig
+    project_collection_config: Optional[dict] = None
 
     @validator('project_id')
     def validate_project_id(cls, value):
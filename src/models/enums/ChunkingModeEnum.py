@@ -0,0 +1,6 @@
+from enum import Enum
+
+class ChunkingModeEnum(Enum):
+
+    TEXT = "text"
+    SPAN = "span"
@@ -0,0 +1,8 @@
+from enum import Enum
+
+class IndexPushModeEnum(Enum):
+
+    FULL = "full"
+    INCREMENTAL = "incremental"
+    # fills the vector db from the embeddings stored with the chunks
+    REBUILD = "rebuild"
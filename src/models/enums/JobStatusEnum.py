@@ -0,0 +1,9 @@
+from enum import Enum
+
+class JobStatusEnum(Enum):
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class JobTypeEnum(Enum):
+
+    PROCESS = "process"
+    INDEX_PUSH = "index_push"
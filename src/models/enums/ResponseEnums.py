@@ -9,14 +9,25 @@ class ResponseSignal(Enum):
     FILE_UPLOAD_FAILED = "file_upload_failed"
     PROCESSING_SUCCESS = "processing_success"
     PROCESSING_FAILED = "processing_failed"
+    CHUNKING_MODE_ERROR = "chunking_mode_not_supported"
     NO_FILES_ERROR = "not_found_files"
     FILE_ID_ERROR = "no_file_found_with_this_id"
     PROJECT_NOT_FOUND_ERROR = "project_not_found"
     INSERT_INTO_VECTORDB_ERROR = "insert_into_vectordb_error"
     INSERT_INTO_VECTORDB_SUCCESS = "insert_into_vectordb_success"
+    INDEX_PUSH_MODE_ERROR = "index_push_mode_not_supported"
+    VECTORDB_COLLECTION_CONFIG_ERROR = "vectordb_collection_config_not_supported"
     VECTORDB_COLLECTION_RETRIEVED = "vectordb_collection_retrieved"
     VECTORDB_SEARCH_ERROR = "vectordb_search_error"
     VECTORDB_SEARCH_SUCCESS = "vectordb_search_success"
+    VECTORDB_SEARCH_BATCH_SIZE_ERROR = "vectordb_search_batch_size_not_supported"
+    VECTORDB_SEARCH_LIMIT_ERROR = "vectordb_search_limit_not_supported"
     RAG_ANSWER_ERROR = "rag_answer_error"
     RAG_ANSWER_SUCCESS = "rag_answer_success"
+    JOB_SUBMITTED = "job_submitted"
+    JOB_RETRIEVED = "job_retrieved"
+    JOB_NOT_FOUND = "job_not_found"
+    JOB_CANCELLED = "job_cancelled"
+    JOB_RESUMED = "job_resumed"
+    JOB_STATUS_ERROR = "job_status_does_not_allow_this_action"
     
\ No newline at end of file
@@ -1,6 +1,9 @@
 from fastapi import FastAPI, APIRouter, Depends
 import os
 from helpers.config import get_settings, Settings
+from routes.dependencies import get_project_model, get_nlp_controller
+from models.ProjectModel import ProjectModel
+from controllers import NLPController
 
 base_router = APIRouter(
     prefix="/api/v1",
@@ -17,3 +20,12 @@ async def welcome(app_settings: Settings = Depends(get_settings)):
         "app_name": app_name,
         "app_version": app_version,
     }
+
+@base_router.get("/metrics")
+async def get_metrics(project_model: ProjectModel = Depends(get_project_model),
+                      nlp_controller: NLPController = Depends(get_nlp_controller)):
+
+    return {
+        "project_cache": project_model.get_project_cache_stats(),
+        "embedding_cache": nlp_controller.get_embedding_cache_stats(),
+    }
@@ -1,17 +1,22 @@
-from fastapi import FastAPI, APIRouter, Depends, UploadFile, status, Request
+from fastapi import FastAPI, APIRouter, Depends, UploadFile, status
 from fastapi.responses import JSONResponse
 import os
 from helpers.config import get_settings, Settings
-from controllers import DataController, ProjectController, ProcessController
+from controllers import DataController, ProjectController, ProcessController, JobController
 import aiofiles
+import asyncio
+import hashlib
 from models import ResponseSignal
 import logging
 from .schemes.data import ProcessRequest
+from .dependencies import get_project_model, get_asset_model, get_job_controller
 from models.ProjectModel import ProjectModel
-from models.ChunkModel import ChunkModel
 from models.AssetModel import AssetModel
 from models.db_schemes import DataChunk, Asset
 from models.enums.AssetTypeEnum import AssetTypeEnum
+from models.enums.JobTypeEnum import JobTypeEnum
+from models.enums.ChunkingModeEnum import ChunkingModeEnum
+from pymongo.errors import DuplicateKeyError
 
 logger = logging.getLogger('uvicorn.error')
 
@@ -21,13 +26,10 @@ data_router = APIRouter(
 )
 
 @data_router.post("/upload/{project_id}")
-async def upload_data(request: Request, project_id: str, file: UploadFile,
-                      app_settings: Settings = Depends(get_settings)):
-        
-    
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
+async def upload_data(project_id: str, file: UploadFile,
+                      app_settings: Settings = Depends(get_settings),
+                      project_model: ProjectModel = Depends(get_project_model),
+                      asset_model: AssetModel = Depends(get_asset_model)):
 
     project = await project_model.get_project_or_create_one(
         project_id=project_id
@@ -52,9 +54,13 @@ async def upload_data(request: Request, project_id: str, file: UploadFile,
         project_id=project_id
     )
 
+    # hash the content while it is written, identical uploads are detected without a second read
+    file_hash = hashlib.sha256()
+
     try:
         async with aiofiles.open(file_path, "wb") as f:
             while chunk := await file.read(app_settings.FILE_DEFAULT_CHUNK_SIZE):
+                file_hash.update(chunk)
                 await f.write(chunk)
     except Exception as e:
 
@@ -67,46 +73,91 @@ async def upload_data(request: Request, project_id: str, file: UploadFile,
             }
         )
 
-    # store the assets into the database
-    asset_model = await AssetModel.create_instance(
-        db_client=request.app.db_client
-    )
+    file_hash = file_hash.hexdigest()
 
-    asset_resource = Asset(
+    # a retried or repeated upload resolves to the asset already holding the same content
+    asset_record = await asset_model.get_asset_record_by_hash(
         asset_project_id=project.id,
-        asset_type=AssetTypeEnum.FILE.value,
-        asset_name=file_id,
-        asset_size=os.path.getsize(file_path)
+        asset_hash=file_hash
     )
 
-    asset_record = await asset_model.create_asset(asset=asset_resource)
+    if asset_record is None:
+        if app_settings.FILE_DEDUP_ACROSS_PROJECTS:
+            _ = data_controller.link_shared_blob(file_path=file_path, file_hash=file_hash)
+
+        asset_resource = Asset(
+            asset_project_id=project.id,
+            asset_type=AssetTypeEnum.FILE.value,
+            asset_name=file_id,
+            asset_size=os.path.getsize(file_path),
+            asset_hash=file_hash
+        )
+
+        # a conflict on the hash means a concurrent upload stored the same content in the
+        # meantime. Any other conflict, or a racing insert that got rolled back, is retried once
+        for _ in range(2):
+            try:
+                asset_record = await asset_model.create_asset(asset=asset_resource)
+
+                return JSONResponse(
+                        content={
+                            "signal": ResponseSignal.FILE_UPLOAD_SUCCESS.value,
+                            "file_id": str(asset_record.id),
+                            "is_duplicate": False,
+                        }
+                    )
+            except DuplicateKeyError:
+                asset_record = await asset_model.get_asset_record_by_hash(
+                    asset_project_id=project.id,
+                    asset_hash=file_hash
+                )
+
+                if asset_record is not None:
+                    break
+
+        if asset_record is None:
+            # the file stays on disk, no asset holding the same content was found
+            logger.error(f"Error while creating the asset of file: {file_id}")
+
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    "signal": ResponseSignal.FILE_UPLOAD_FAILED.value
+                }
+            )
+
+    os.remove(file_path)
 
     return JSONResponse(
             content={
                 "signal": ResponseSignal.FILE_UPLOAD_SUCCESS.value,
                 "file_id": str(asset_record.id),
+                "is_duplicate": True,
             }
         )
 
 @data_router.post("/process/{project_id}")
-async def process_endpoint(request: Request, project_id: str, process_request: ProcessRequest):
+async def process_endpoint(project_id: str, process_request: ProcessRequest,
+                           project_model: ProjectModel = Depends(get_project_model),
+                           asset_model: AssetModel = Depends(get_asset_model),
+                           job_controller: JobController = Depends(get_job_controller)):
 
     chunk_size = process_request.chunk_size
     overlap_size = process_request.overlap_size
     do_reset = process_request.do_reset
 
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
+    if process_request.chunking_mode not in [ mode.value for mode in ChunkingModeEnum ]:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.CHUNKING_MODE_ERROR.value
+            }
+        )
 
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
 
-    asset_model = await AssetModel.create_instance(
-            db_client=request.app.db_client
-        )
-
     project_files_ids = {}
     if process_request.file_id:
         asset_record = await asset_model.get_asset_record(
@@ -147,61 +198,24 @@ async def process_endpoint(request: Request, project_id: str, process_request: P
             }
         )
     
-    process_controller = ProcessController(project_id=project_id)
-
-    no_records = 0
-    no_files = 0
-
-    chunk_model = await ChunkModel.create_instance(
-                        db_client=request.app.db_client
-                    )
-
-    if do_reset == 1:
-        _ = await chunk_model.delete_chunks_by_project_id(
-            project_id=project.id
-        )
-
-    for asset_id, file_id in project_files_ids.items():
-
-        file_content = process_controller.get_file_content(file_id=file_id)
-
-        if file_content is None:
-            logger.error(f"Error while processing file: {file_id}")
-            continue
-
-        file_chunks = process_controller.process_file_content(
-            file_content=file_content,
-            file_id=file_id,
-            chunk_size=chunk_size,
-            overlap_size=overlap_size
-        )
-
-        if file_chunks is None or len(file_chunks) == 0:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={
-                    "signal": ResponseSignal.PROCESSING_FAILED.value
-                }
-            )
-
-        file_chunks_records = [
-            DataChunk(
-                chunk_text=chunk.page_content,
-                chunk_metadata=chunk.metadata,
-                chunk_order=i+1,
-                chunk_project_id=project.id,
-                chunk_asset_id=asset_id
-            )
-            for i, chunk in enumerate(file_chunks)
-        ]
-
-        no_records += await chunk_model.insert_many_chunks(chunks=file_chunks_records)
-        no_files += 1
+    # the files are processed in the background, progress is polled through the jobs api
+    job = await job_controller.submit_job(
+        project=project,
+        job_type=JobTypeEnum.PROCESS.value,
+        job_params={
+            "file_id": process_request.file_id,
+            "chunk_size": chunk_size,
+            "overlap_size": overlap_size,
+            "do_reset": do_reset,
+            "streaming": process_request.streaming,
+            "chunking_mode": process_request.chunking_mode,
+        }
+    )
 
     return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
         content={
-            "signal": ResponseSignal.PROCESSING_SUCCESS.value,
-            "inserted_chunks": no_records,
-            "processed_files": no_files
+            "signal": ResponseSignal.JOB_SUBMITTED.value,
+            "job_id": str(job.id),
         }
     )
@@ -0,0 +1,24 @@
+from fastapi import Depends, Request
+from helpers.app_container import AppContainer
+from models.ProjectModel import ProjectModel
+from models.AssetModel import AssetModel
+from models.ChunkModel import ChunkModel
+from controllers import NLPController, JobController
+
+def get_container(request: Request) -> AppContainer:
+    return request.app.container
+
+def get_project_model(container: AppContainer = Depends(get_container)) -> ProjectModel:
+    return container.project_model
+
+def get_asset_model(container: AppContainer = Depends(get_container)) -> AssetModel:
+    return container.asset_model
+
+def get_chunk_model(container: AppContainer = Depends(get_container)) -> ChunkModel:
+    return container.chunk_model
+
+def get_nlp_controller(container: AppContainer = Depends(get_container)) -> NLPController:
+    return container.nlp_controller
+
+def get_job_controller(request: Request) -> JobController:
+    return request.app.job_controller
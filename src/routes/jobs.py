@@ -0,0 +1,112 @@
+from fastapi import FastAPI, APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+from routes.dependencies import get_project_model, get_job_controller
+from models.ProjectModel import ProjectModel
+from controllers import JobController
+from models import ResponseSignal
+
+import logging
+
+logger = logging.getLogger('uvicorn.error')
+
+jobs_router = APIRouter(
+    prefix="/api/v1/jobs",
+    tags=["api_v1", "jobs"],
+)
+
+@jobs_router.get("/{job_id}")
+async def get_job(job_id: str, job_controller: JobController = Depends(get_job_controller)):
+
+    job = await job_controller.job_model.get_job(job_id=job_id)
+
+    if job is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.JOB_NOT_FOUND.value
+            }
+        )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.JOB_RETRIEVED.value,
+            "job": job_controller.get_job_summary(job=job),
+        }
+    )
+
+@jobs_router.get("/project/{project_id}")
+async def get_project_jobs(project_id: str, limit: int = 20,
+                           project_model: ProjectModel = Depends(get_project_model),
+                           job_controller: JobController = Depends(get_job_controller)):
+
+    project = await project_model.get_project_or_create_one(
+        project_id=project_id
+    )
+
+    jobs = await job_controller.job_model.get_project_jobs(
+        project_id=project.id,
+        limit=limit
+    )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.JOB_RETRIEVED.value,
+            "jobs": [ job_controller.get_job_summary(job=job) for job in jobs ],
+        }
+    )
+
+@jobs_router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str, job_controller: JobController = Depends(get_job_controller)):
+
+    is_cancelled = await job_controller.cancel_job(job_id=job_id)
+
+    if is_cancelled is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.JOB_NOT_FOUND.value
+            }
+        )
+
+    if not is_cancelled:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.JOB_STATUS_ERROR.value
+            }
+        )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.JOB_CANCELLED.value,
+            "job_id": job_id,
+        }
+    )
+
+@jobs_router.post("/{job_id}/resume")
+async def resume_job(job_id: str, job_controller: JobController = Depends(get_job_controller)):
+
+    is_resumed = await job_controller.resume_job(job_id=job_id)
+
+    if is_resumed is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.JOB_NOT_FOUND.value
+            }
+        )
+
+    if not is_resumed:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.JOB_STATUS_ERROR.value
+            }
+        )
+
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.JOB_RESUMED.value,
+            "job_id": job_id,
+        }
+    )
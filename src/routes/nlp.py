@@ -1,10 +1,14 @@
-from fastapi import FastAPI, APIRouter, status, Request
+from fastapi import FastAPI, APIRouter, Depends, status
 from fastapi.responses import JSONResponse
-from routes.schemes.nlp import PushRequest, SearchRequest
+from routes.schemes.nlp import PushRequest, SearchRequest, BatchSearchRequest
+from routes.dependencies import get_project_model, get_nlp_controller, get_job_controller
 from models.ProjectModel import ProjectModel
-from models.ChunkModel import ChunkModel
-from controllers import NLPController
+from helpers.config import get_settings, Settings
+from controllers import NLPController, JobController
 from models import ResponseSignal
+from models.enums.IndexPushModeEnum import IndexPushModeEnum
+from models.enums.JobTypeEnum import JobTypeEnum
+from stores.vectordb.VectorDBEnums import QuantizationEnums
 
 import logging
 
@@ -16,15 +20,9 @@ nlp_router = APIRouter(
 )
 
 @nlp_router.post("/index/push/{project_id}")
-async def index_project(request: Request, project_id: str, push_request: PushRequest):
-
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
-
-    chunk_model = await ChunkModel.create_instance(
-        db_client=request.app.db_client
-    )
+async def index_project(project_id: str, push_request: PushRequest,
+                        project_model: ProjectModel = Depends(get_project_model),
+                        job_controller: JobController = Depends(get_job_controller)):
 
     project = await project_model.get_project_or_create_one(
         project_id=project_id
@@ -37,74 +35,59 @@ async def index_project(request: Request, project_id: str, push_request: PushReq
                 "signal": ResponseSignal.PROJECT_NOT_FOUND_ERROR.value
             }
         )
-    
-    nlp_controller = NLPController(
-        vectordb_client=request.app.vectordb_client,
-        generation_client=request.app.generation_client,
-        embedding_client=request.app.embedding_client,
-        template_parser=request.app.template_parser,
-    )
 
-    has_records = True
-    page_no = 1
-    inserted_items_count = 0
-    idx = 0
-
-    while has_records:
-        page_chunks = await chunk_model.get_poject_chunks(project_id=project.id, page_no=page_no)
-        if len(page_chunks):
-            page_no += 1
-        
-        if not page_chunks or len(page_chunks) == 0:
-            has_records = False
-            break
-
-        chunks_ids =  list(range(idx, idx + len(page_chunks)))
-        idx += len(page_chunks)
-        
-        is_inserted = nlp_controller.index_into_vector_db(
-            project=project,
-            chunks=page_chunks,
-            do_reset=push_request.do_reset,
-            chunks_ids=chunks_ids
+    if push_request.mode not in [ mode.value for mode in IndexPushModeEnum ]:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.INDEX_PUSH_MODE_ERROR.value
+            }
         )
+    
+    if push_request.collection_config is not None:
+        collection_config = push_request.collection_config.dict(exclude_none=True)
 
-        if not is_inserted:
+        if collection_config.get("quantization", QuantizationEnums.NONE.value) not in [ q.value for q in QuantizationEnums ]:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={
-                    "signal": ResponseSignal.INSERT_INTO_VECTORDB_ERROR.value
+                    "signal": ResponseSignal.VECTORDB_COLLECTION_CONFIG_ERROR.value
                 }
             )
-        
-        inserted_items_count += len(page_chunks)
-        
+
+        project = await project_model.update_project_collection_config(
+            project=project,
+            collection_config=collection_config
+        )
+
+    # pushing runs in the background, progress is polled through the jobs api
+    job = await job_controller.submit_job(
+        project=project,
+        job_type=JobTypeEnum.INDEX_PUSH.value,
+        job_params={
+            "mode": push_request.mode,
+            "do_reset": push_request.do_reset,
+        }
+    )
+
     return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
         content={
-            "signal": ResponseSignal.INSERT_INTO_VECTORDB_SUCCESS.value,
-            "inserted_items_count": inserted_items_count
+            "signal": ResponseSignal.JOB_SUBMITTED.value,
+            "job_id": str(job.id),
         }
     )
 
 @nlp_router.get("/index/info/{project_id}")
-async def get_project_index_info(request: Request, project_id: str):
+async def get_project_index_info(project_id: str,
+                                 project_model: ProjectModel = Depends(get_project_model),
+                                 nlp_controller: NLPController = Depends(get_nlp_controller)):
     
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
-
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
 
-    nlp_controller = NLPController(
-        vectordb_client=request.app.vectordb_client,
-        generation_client=request.app.generation_client,
-        embedding_client=request.app.embedding_client,
-        template_parser=request.app.template_parser,
-    )
-
-    collection_info = nlp_controller.get_vector_db_collection_info(project=project)
+    collection_info = await nlp_controller.get_vector_db_collection_info(project=project)
 
     return JSONResponse(
         content={
@@ -114,24 +97,15 @@ async def get_project_index_info(request: Request, project_id: str):
     )
 
 @nlp_router.post("/index/search/{project_id}")
-async def search_index(request: Request, project_id: str, search_request: SearchRequest):
+async def search_index(project_id: str, search_request: SearchRequest,
+                       project_model: ProjectModel = Depends(get_project_model),
+                       nlp_controller: NLPController = Depends(get_nlp_controller)):
     
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
-
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
 
-    nlp_controller = NLPController(
-        vectordb_client=request.app.vectordb_client,
-        generation_client=request.app.generation_client,
-        embedding_client=request.app.embedding_client,
-        template_parser=request.app.template_parser,
-    )
-
-    results = nlp_controller.search_vector_db_collection(
+    results = await nlp_controller.search_vector_db_collection_async(
         project=project, text=search_request.text, limit=search_request.limit
     )
 
@@ -150,25 +124,65 @@ async def search_index(request: Request, project_id: str, search_request: Search
         }
     )
 
-@nlp_router.post("/index/answer/{project_id}")
-async def answer_rag(request: Request, project_id: str, search_request: SearchRequest):
-    
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
+@nlp_router.post("/index/search/batch/{project_id}")
+async def search_index_batch(project_id: str, search_request: BatchSearchRequest,
+                             app_settings: Settings = Depends(get_settings),
+                             project_model: ProjectModel = Depends(get_project_model),
+                             nlp_controller: NLPController = Depends(get_nlp_controller)):
+
+    if not 0 < len(search_request.texts) <= app_settings.VECTOR_DB_SEARCH_BATCH_MAX_QUERIES:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.VECTORDB_SEARCH_BATCH_SIZE_ERROR.value
+            }
+        )
+
+    if search_request.limit is None or search_request.limit < 1:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.VECTORDB_SEARCH_LIMIT_ERROR.value
+            }
+        )
 
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
 
-    nlp_controller = NLPController(
-        vectordb_client=request.app.vectordb_client,
-        generation_client=request.app.generation_client,
-        embedding_client=request.app.embedding_client,
-        template_parser=request.app.template_parser,
+    batch_results = await nlp_controller.search_vector_db_collection_batch_async(
+        project=project, texts=search_request.texts, limit=search_request.limit
+    )
+
+    if batch_results is False:
+        return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    "signal": ResponseSignal.VECTORDB_SEARCH_ERROR.value
+                }
+            )
+
+    # one list of results per query, in the order of the queries
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.VECTORDB_SEARCH_SUCCESS.value,
+            "results": [
+                [ result.dict() for result in results ]
+                for results in batch_results
+            ]
+        }
+    )
+
+@nlp_router.post("/index/answer/{project_id}")
+async def answer_rag(project_id: str, search_request: SearchRequest,
+                     project_model: ProjectModel = Depends(get_project_model),
+                     nlp_controller: NLPController = Depends(get_nlp_controller)):
+    
+    project = await project_model.get_project_or_create_one(
+        project_id=project_id
     )
 
-    answer, full_prompt, chat_history = nlp_controller.answer_rag_question(
+    answer, full_prompt, chat_history = await nlp_controller.answer_rag_question_async(
         project=project,
         query=search_request.text,
         limit=search_request.limit,
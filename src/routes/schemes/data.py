@@ -6,3 +6,5 @@ class ProcessRequest(BaseModel):
     chunk_size: Optional[int] = 100
     overlap_size: Optional[int] = 20
     do_reset: Optional[int] = 0
+    streaming: Optional[int] = 0
+    chunking_mode: Optional[str] = "text"
@@ -1,9 +1,28 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from models.enums.IndexPushModeEnum import IndexPushModeEnum
+
+class CollectionConfig(BaseModel):
+    quantization: Optional[str] = None
+    quantization_always_ram: Optional[bool] = None
+    on_disk_vectors: Optional[bool] = None
+    on_disk_payload: Optional[bool] = None
+    hnsw_m: Optional[int] = Field(None, gt=0)
+    hnsw_ef_construct: Optional[int] = Field(None, gt=0)
+    search_rescore: Optional[bool] = None
+    search_oversampling: Optional[float] = Field(None, gt=0)
+    search_hnsw_ef: Optional[int] = Field(None, gt=0)
 
 class PushRequest(BaseModel):
     do_reset: Optional[int] = 0
+    mode: Optional[str] = IndexPushModeEnum.FULL.value
+    # saved on the project, applies whenever its collection is created, e.g. with do_reset
+    collection_config: Optional[CollectionConfig] = None
 
 class SearchRequest(BaseModel):
     text: str
     limit: Optional[int] = 5
+
+class BatchSearchRequest(BaseModel):
+    texts: List[str]
+    limit: Optional[int] = 5
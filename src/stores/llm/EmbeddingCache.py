@@ -0,0 +1,152 @@
+from array import array
+from typing import List
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+class EmbeddingCache:
+
+    def __init__(self, db_path: str, backend: str, model_id: str, embedding_size: int,
+                       max_entries: int = 1000000):
+
+        self.db_path = db_path
+        self.max_entries = max_entries
+
+        # every entry key embeds the backend and model so switching models never serves stale vectors
+        self.namespace = f"{backend}:{model_id}:{embedding_size}"
+
+        self.hits = 0
+        self.misses = 0
+
+        # upper bound of the stored entries, refreshed from sqlite only when eviction may be needed
+        self.entries_count = 0
+
+        self.lock = threading.Lock()
+        self.connection = None
+        self.logger = logging.getLogger(__name__)
+
+    def connect(self):
+        self.connection = sqlite3.connect(
+            os.path.join(self.db_path, "embeddings.sqlite3"),
+            check_same_thread=False,
+        )
+
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                cache_key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access_index ON embeddings (last_access)"
+        )
+        self.connection.commit()
+
+        self.entries_count = self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def disconnect(self):
+        if self.connection:
+            self.connection.close()
+        self.connection = None
+
+    def create_cache_key(self, text: str, document_type: str = None):
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{document_type}:{text_hash}"
+
+    def get_many(self, texts: List[str], document_type: str = None):
+        """Return a list aligned with texts holding the cached vector or None."""
+
+        if not self.connection or len(texts) == 0:
+            with self.lock:
+                self.misses += len(texts)
+            return [None] * len(texts)
+
+        keys = [ self.create_cache_key(text=text, document_type=document_type) for text in texts ]
+
+        found = {}
+        with self.lock:
+            # stay below sqlite's bound parameters limit
+            for i in range(0, len(keys), 500):
+                batch_keys = list(set(keys[i:i+500]))
+                placeholders = ",".join("?" * len(batch_keys))
+
+                rows = self.connection.execute(
+                    f"SELECT cache_key, vector FROM embeddings WHERE cache_key IN ({placeholders})",
+                    batch_keys,
+                ).fetchall()
+
+                for cache_key, vector in rows:
+                    found[cache_key] = array("f", vector).tolist()
+
+            if found:
+                now = time.time()
+                self.connection.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE cache_key = ?",
+                    [ (now, cache_key) for cache_key in found ],
+                )
+                self.connection.commit()
+
+        vectors = [ found.get(key) for key in keys ]
+
+        hits = sum(1 for vector in vectors if vector is not None)
+        with self.lock:
+            self.hits += hits
+            self.misses += len(vectors) - hits
+
+        return vectors
+
+    def set_many(self, texts: List[str], vectors: List[list], document_type: str = None):
+
+        if not self.connection or len(texts) == 0:
+            return False
+
+        now = time.time()
+        rows = [
+            (self.create_cache_key(text=text, document_type=document_type),
+             array("f", vector).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+            if vector
+        ]
+
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (cache_key, vector, last_access) VALUES (?, ?, ?)",
+                rows,
+            )
+            self.entries_count += len(rows)
+            if self.entries_count > self.max_entries:
+                self.evict()
+            self.connection.commit()
+
+        return True
+
+    def evict(self):
+        # drop the least recently used entries once the cache grows over its limit
+        total_entries = self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = total_entries - self.max_entries
+
+        if overflow > 0:
+            self.connection.execute(
+                """DELETE FROM embeddings WHERE cache_key IN (
+                    SELECT cache_key FROM embeddings ORDER BY last_access ASC LIMIT ?
+                )""",
+                (overflow,),
+            )
+            total_entries -= overflow
+
+        self.entries_count = total_entries
+
+    def get_stats(self):
+        total = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
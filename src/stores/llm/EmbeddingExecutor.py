@@ -0,0 +1,122 @@
+from .LLMInterface import LLMInterface
+from .batching import estimate_tokens
+import asyncio
+import logging
+import random
+import time
+
+class TokenBucket:
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = rate_per_minute
+        self.rate_per_second = rate_per_minute / 60.0
+
+        self.tokens = float(rate_per_minute)
+        self.updated_at = time.monotonic()
+
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    async def acquire(self, amount: int = 1):
+        # a single request bigger than the bucket can only ever wait for a full bucket
+        amount = min(amount, self.capacity)
+
+        async with self.lock:
+            self.refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate_per_second)
+                self.refill()
+
+            self.tokens -= amount
+
+class EmbeddingExecutor:
+
+    RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+    def __init__(self, embedding_client: LLMInterface,
+                       max_concurrency: int = 4,
+                       requests_per_minute: int = None,
+                       tokens_per_minute: int = None,
+                       max_retries: int = 5,
+                       backoff_base: float = 1.0,
+                       backoff_max: float = 60.0):
+
+        self.embedding_client = embedding_client
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.requests_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+        self.logger = logging.getLogger(__name__)
+
+    def is_retryable_error(self, error: Exception):
+        if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+            return True
+
+        status_code = getattr(error, "status_code", None)
+        if status_code is None and getattr(error, "response", None) is not None:
+            status_code = getattr(error.response, "status_code", None)
+
+        return status_code in self.RETRYABLE_STATUS_CODES
+
+    def get_backoff_delay(self, attempt: int):
+        # full jitter keeps retrying workers from hitting the provider in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def wait_for_quota(self, batch: list):
+        if self.requests_bucket:
+            await self.requests_bucket.acquire(1)
+
+        if self.tokens_bucket:
+            await self.tokens_bucket.acquire(sum(estimate_tokens(text) for text in batch))
+
+    async def embed_batch(self, batch: list, document_type: str = None):
+
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+
+                await self.wait_for_quota(batch=batch)
+
+                try:
+                    return await self.embedding_client.embed_texts_async(texts=batch, document_type=document_type)
+                except Exception as e:
+                    if not self.is_retryable_error(e) or attempt == self.max_retries:
+                        self.logger.error(f"Error while embedding batch of {len(batch)} texts: {e}")
+                        return None
+
+                    delay = self.get_backoff_delay(attempt=attempt)
+                    self.logger.warning(f"Retrying embedding batch in {delay:.2f}s after error: {e}")
+                    await asyncio.sleep(delay)
+
+        return None
+
+    async def embed_texts(self, texts: list, document_type: str = None):
+        """Embed texts with several provider batches in flight, returning the vectors
+        in input order, or None when any batch could not be embedded."""
+
+        if len(texts) == 0:
+            return []
+
+        batches = self.embedding_client.get_embedding_batches(texts=texts)
+
+        results = await asyncio.gather(*[
+            self.embed_batch(batch=batch, document_type=document_type)
+            for batch in batches
+        ])
+
+        vectors = []
+        for batch, batch_vectors in zip(batches, results):
+            if not batch_vectors or len(batch_vectors) != len(batch):
+                return None
+
+            vectors.extend(batch_vectors)
+
+        return vectors
@@ -15,10 +15,31 @@ class LLMInterface(ABC):
                             temperature: float = None):
         pass
 
+    @abstractmethod
+    async def generate_text_async(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                                        temperature: float = None):
+        pass
+
     @abstractmethod
     def embed_text(self, text: str, document_type: str = None):
         pass
 
+    @abstractmethod
+    def embed_texts(self, texts: list, document_type: str = None):
+        pass
+
+    @abstractmethod
+    def get_embedding_batches(self, texts: list):
+        pass
+
+    @abstractmethod
+    async def embed_text_async(self, text: str, document_type: str = None):
+        pass
+
+    @abstractmethod
+    async def embed_texts_async(self, texts: list, document_type: str = None):
+        pass
+
     @abstractmethod
     def construct_prompt(self, prompt: str, role: str):
         pass
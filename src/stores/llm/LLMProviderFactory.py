@@ -13,7 +13,9 @@ class LLMProviderFactory:
                 api_url = self.config.OPENAI_API_URL,
                 default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE
+                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                embedding_max_batch_size=self.config.EMBEDDING_MAX_BATCH_SIZE,
+                embedding_max_batch_tokens=self.config.EMBEDDING_MAX_BATCH_TOKENS,
             )
 
         if provider == LLMEnums.COHERE.value:
@@ -21,7 +23,9 @@ class LLMProviderFactory:
                 api_key = self.config.COHERE_API_KEY,
                 default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE
+                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                embedding_max_batch_size=self.config.EMBEDDING_MAX_BATCH_SIZE,
+                embedding_max_batch_tokens=self.config.EMBEDDING_MAX_BATCH_TOKENS,
             )
 
         return None
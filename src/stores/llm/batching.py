@@ -0,0 +1,34 @@
+from typing import List
+
+# rough average for english / multilingual text, used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str):
+    return (len(text) // CHARS_PER_TOKEN) + 1
+
+def split_into_batches(texts: List[str], max_batch_size: int, max_batch_tokens: int = None):
+    """Split texts into ordered batches that respect the provider's per request
+    limits on the number of inputs and (estimated) tokens."""
+
+    batches = []
+    current_batch = []
+    current_tokens = 0
+
+    for text in texts:
+        text_tokens = estimate_tokens(text)
+
+        batch_is_full = len(current_batch) >= max_batch_size
+        tokens_exceeded = max_batch_tokens is not None and current_tokens + text_tokens > max_batch_tokens
+
+        if current_batch and (batch_is_full or tokens_exceeded):
+            batches.append(current_batch)
+            current_batch = []
+            current_tokens = 0
+
+        current_batch.append(text)
+        current_tokens += text_tokens
+
+    if current_batch:
+        batches.append(current_batch)
+
+    return batches
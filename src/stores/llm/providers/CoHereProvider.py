@@ -1,14 +1,21 @@
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import CoHereEnums, DocumentTypeEnum
+from ..batching import split_into_batches
 import cohere
 import logging
 
 class CoHereProvider(LLMInterface):
 
+    # per request limits of the embed endpoint, every text is truncated to 512 tokens
+    EMBEDDING_MAX_BATCH_SIZE = 96
+    EMBEDDING_MAX_BATCH_TOKENS = 96 * 512
+
     def __init__(self, api_key: str,
                        default_input_max_characters: int=1000,
                        default_generation_max_output_tokens: int=1000,
-                       default_generation_temperature: float=0.1):
+                       default_generation_temperature: float=0.1,
+                       embedding_max_batch_size: int=None,
+                       embedding_max_batch_tokens: int=None):
         
         self.api_key = api_key
 
@@ -16,12 +23,16 @@ class CoHereProvider(LLMInterface):
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
 
+        self.embedding_max_batch_size = embedding_max_batch_size if embedding_max_batch_size else self.EMBEDDING_MAX_BATCH_SIZE
+        self.embedding_max_batch_tokens = embedding_max_batch_tokens if embedding_max_batch_tokens else self.EMBEDDING_MAX_BATCH_TOKENS
+
         self.generation_model_id = None
 
         self.embedding_model_id = None
         self.embedding_size = None
 
         self.client = cohere.Client(api_key=self.api_key)
+        self.async_client = cohere.AsyncClient(api_key=self.api_key)
 
         self.enums = CoHereEnums
         self.logger = logging.getLogger(__name__)
@@ -63,6 +74,34 @@ class CoHereProvider(LLMInterface):
             return None
         
         return response.text
+
+    async def generate_text_async(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                                        temperature: float = None):
+
+        if not self.async_client:
+            self.logger.error("CoHere async client was not set")
+            return None
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for CoHere was not set")
+            return None
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        response = await self.async_client.chat(
+            model = self.generation_model_id,
+            chat_history = chat_history,
+            message = self.process_text(prompt),
+            temperature = temperature,
+            max_tokens = max_output_tokens
+        )
+
+        if not response or not response.text:
+            self.logger.error("Error while generating text with CoHere")
+            return None
+        
+        return response.text
     
     def embed_text(self, text: str, document_type: str = None):
         if not self.client:
@@ -74,7 +113,7 @@ class CoHereProvider(LLMInterface):
             return None
         
         input_type = CoHereEnums.DOCUMENT
-        if document_type == DocumentTypeEnum.QUERY:
+        if document_type == DocumentTypeEnum.QUERY.value:
             input_type = CoHereEnums.QUERY
 
         response = self.client.embed(
@@ -89,6 +128,86 @@ class CoHereProvider(LLMInterface):
             return None
         
         return response.embeddings.float[0]
+
+    async def embed_text_async(self, text: str, document_type: str = None):
+
+        vectors = await self.embed_texts_async(texts=[text], document_type=document_type)
+        if not vectors:
+            return None
+
+        return vectors[0]
+
+    def embed_texts(self, texts: list, document_type: str = None):
+        if not self.client:
+            self.logger.error("CoHere client was not set")
+            return None
+        
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for CoHere was not set")
+            return None
+        
+        input_type = CoHereEnums.DOCUMENT
+        if document_type == DocumentTypeEnum.QUERY.value:
+            input_type = CoHereEnums.QUERY
+
+        vectors = []
+        for batch in self.get_embedding_batches(texts=texts):
+
+            response = self.client.embed(
+                model = self.embedding_model_id,
+                texts = batch,
+                input_type = input_type,
+                embedding_types=['float'],
+            )
+
+            if not response or not response.embeddings or not response.embeddings.float \
+                    or len(response.embeddings.float) != len(batch):
+                self.logger.error("Error while embedding texts batch with CoHere")
+                return None
+
+            vectors.extend(response.embeddings.float)
+
+        return vectors
+
+    async def embed_texts_async(self, texts: list, document_type: str = None):
+        if not self.async_client:
+            self.logger.error("CoHere async client was not set")
+            return None
+        
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for CoHere was not set")
+            return None
+        
+        input_type = CoHereEnums.DOCUMENT
+        if document_type == DocumentTypeEnum.QUERY.value:
+            input_type = CoHereEnums.QUERY
+
+        vectors = []
+        for batch in self.get_embedding_batches(texts=texts):
+
+            response = await self.async_client.embed(
+                model = self.embedding_model_id,
+                texts = batch,
+                input_type = input_type,
+                embedding_types=['float'],
+            )
+
+            if not response or not response.embeddings or not response.embeddings.float \
+                    or len(response.embeddings.float) != len(batch):
+                self.logger.error("Error while embedding texts batch with CoHere")
+                return None
+
+            vectors.extend(response.embeddings.float)
+
+        return vectors
+
+    def get_embedding_batches(self, texts: list):
+        # texts are truncated before batching, so token limits apply to what is actually sent
+        return split_into_batches(
+            texts=[ self.process_text(text) for text in texts ],
+            max_batch_size=self.embedding_max_batch_size,
+            max_batch_tokens=self.embedding_max_batch_tokens,
+        )
     
     def construct_prompt(self, prompt: str, role: str):
         return {
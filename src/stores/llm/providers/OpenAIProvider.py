@@ -1,14 +1,21 @@
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import OpenAIEnums
-from openai import OpenAI
+from ..batching import split_into_batches
+from openai import OpenAI, AsyncOpenAI
 import logging
 
 class OpenAIProvider(LLMInterface):
 
+    # per request limits of the embeddings endpoint
+    EMBEDDING_MAX_BATCH_SIZE = 2048
+    EMBEDDING_MAX_BATCH_TOKENS = 300000
+
     def __init__(self, api_key: str, api_url: str=None,
                        default_input_max_characters: int=1000,
                        default_generation_max_output_tokens: int=1000,
-                       default_generation_temperature: float=0.1):
+                       default_generation_temperature: float=0.1,
+                       embedding_max_batch_size: int=None,
+                       embedding_max_batch_tokens: int=None):
         
         self.api_key = api_key
         self.api_url = api_url
@@ -17,6 +24,9 @@ class OpenAIProvider(LLMInterface):
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
 
+        self.embedding_max_batch_size = embedding_max_batch_size if embedding_max_batch_size else self.EMBEDDING_MAX_BATCH_SIZE
+        self.embedding_max_batch_tokens = embedding_max_batch_tokens if embedding_max_batch_tokens else self.EMBEDDING_MAX_BATCH_TOKENS
+
         self.generation_model_id = None
 
         self.embedding_model_id = None
@@ -27,6 +37,11 @@ class OpenAIProvider(LLMInterface):
             base_url = self.api_url if self.api_url and len(self.api_url) else None
         )
 
+        self.async_client = AsyncOpenAI(
+            api_key = self.api_key,
+            base_url = self.api_url if self.api_url and len(self.api_url) else None
+        )
+
         self.enums = OpenAIEnums
         self.logger = logging.getLogger(__name__)
 
@@ -71,6 +86,37 @@ class OpenAIProvider(LLMInterface):
 
         return response.choices[0].message.content
 
+    async def generate_text_async(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                                        temperature: float = None):
+        
+        if not self.async_client:
+            self.logger.error("OpenAI async client was not set")
+            return None
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for OpenAI was not set")
+            return None
+        
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        chat_history.append(
+            self.construct_prompt(prompt=prompt, role=OpenAIEnums.USER.value)
+        )
+
+        response = await self.async_client.chat.completions.create(
+            model = self.generation_model_id,
+            messages = chat_history,
+            max_tokens = max_output_tokens,
+            temperature = temperature
+        )
+
+        if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message:
+            self.logger.error("Error while generating text with OpenAI")
+            return None
+
+        return response.choices[0].message.content
+
 
     def embed_text(self, text: str, document_type: str = None):
         
@@ -93,6 +139,79 @@ class OpenAIProvider(LLMInterface):
 
         return response.data[0].embedding
 
+    async def embed_text_async(self, text: str, document_type: str = None):
+
+        vectors = await self.embed_texts_async(texts=[text], document_type=document_type)
+        if not vectors:
+            return None
+
+        return vectors[0]
+
+    def embed_texts(self, texts: list, document_type: str = None):
+
+        if not self.client:
+            self.logger.error("OpenAI client was not set")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for OpenAI was not set")
+            return None
+
+        vectors = []
+        for batch in self.get_embedding_batches(texts=texts):
+
+            response = self.client.embeddings.create(
+                model = self.embedding_model_id,
+                input = batch,
+            )
+
+            if not response or not response.data or len(response.data) != len(batch):
+                self.logger.error("Error while embedding texts batch with OpenAI")
+                return None
+
+            vectors.extend([
+                record.embedding
+                for record in sorted(response.data, key=lambda record: record.index)
+            ])
+
+        return vectors
+
+    async def embed_texts_async(self, texts: list, document_type: str = None):
+
+        if not self.async_client:
+            self.logger.error("OpenAI async client was not set")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for OpenAI was not set")
+            return None
+
+        vectors = []
+        for batch in self.get_embedding_batches(texts=texts):
+
+            response = await self.async_client.embeddings.create(
+                model = self.embedding_model_id,
+                input = batch,
+            )
+
+            if not response or not response.data or len(response.data) != len(batch):
+                self.logger.error("Error while embedding texts batch with OpenAI")
+                return None
+
+            vectors.extend([
+                record.embedding
+                for record in sorted(response.data, key=lambda record: record.index)
+            ])
+
+        return vectors
+
+    def get_embedding_batches(self, texts: list):
+        return split_into_batches(
+            texts=texts,
+            max_batch_size=self.embedding_max_batch_size,
+            max_batch_tokens=self.embedding_max_batch_tokens,
+        )
+
     def construct_prompt(self, prompt: str, role: str):
         return {
             "role": role,
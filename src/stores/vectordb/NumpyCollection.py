@@ -0,0 +1,318 @@
+import json
+import os
+import shutil
+import threading
+import numpy as np
+from .VectorDBEnums import DistanceMethodEnums
+
+class NumpyCollection:
+    """One collection of the numpy vector db, stored as append-only files in its own directory:
+
+        meta.json       vector size and distance
+        vectors.f32     float32 matrix, one row per point (normalized for cosine)
+        alive.u8        one byte per row, 0 once the point is deleted or overwritten
+        ids.jsonl       the point id of every row
+        payloads.jsonl  the payload of every row
+        offsets.u64     where every payload line starts, so only the top-k payloads are read
+
+    The matrix is memory-mapped, opening a collection reads ids and flags but no vectors.
+    Every read and write holds the collection lock, compaction swaps the state in place.
+    """
+
+    META_FILE = "meta.json"
+    VECTORS_FILE = "vectors.f32"
+    ALIVE_FILE = "alive.u8"
+    IDS_FILE = "ids.jsonl"
+    PAYLOADS_FILE = "payloads.jsonl"
+    OFFSETS_FILE = "offsets.u64"
+
+    def __init__(self, path: str):
+        self.path = path
+
+        self.size = None
+        self.distance = None
+
+        self.rows_count = 0
+        self.alive = np.zeros(0, dtype=bool)
+        self.ids = []
+        self.id_rows = {}
+        self.offsets = np.zeros(0, dtype=np.uint64)
+
+        self.vectors = None
+        self.lock = threading.Lock()
+
+    def get_file_path(self, file_name: str):
+        return os.path.join(self.path, file_name)
+
+    def get_files_sizes(self):
+        return {
+            file_name: os.path.getsize(self.get_file_path(file_name))
+            for file_name in [self.VECTORS_FILE, self.ALIVE_FILE, self.IDS_FILE, self.PAYLOADS_FILE, self.OFFSETS_FILE]
+        }
+
+    def truncate_files(self, files_sizes: dict):
+        for file_name, file_size in files_sizes.items():
+            file_path = self.get_file_path(file_name)
+            if os.path.getsize(file_path) > file_size:
+                os.truncate(file_path, file_size)
+
+    @classmethod
+    def create(cls, path: str, size: int, distance: str):
+        os.makedirs(path, exist_ok=True)
+
+        with open(os.path.join(path, cls.META_FILE), "w") as f:
+            json.dump({"size": size, "distance": distance}, f)
+
+        for file_name in [cls.VECTORS_FILE, cls.ALIVE_FILE, cls.IDS_FILE, cls.PAYLOADS_FILE, cls.OFFSETS_FILE]:
+            open(os.path.join(path, file_name), "wb").close()
+
+        return cls.load(path=path)
+
+    @classmethod
+    def load(cls, path: str):
+        collection = cls(path=path)
+
+        with open(collection.get_file_path(cls.META_FILE)) as f:
+            meta = json.load(f)
+
+        collection.size = meta["size"]
+        collection.distance = meta["distance"]
+
+        alive = np.fromfile(collection.get_file_path(cls.ALIVE_FILE), dtype=np.uint8).astype(bool)
+        offsets = np.fromfile(collection.get_file_path(cls.OFFSETS_FILE), dtype=np.uint64,
+                              count=os.path.getsize(collection.get_file_path(cls.OFFSETS_FILE)) // 8)
+
+        ids = []
+        ids_ends = [0]
+        with open(collection.get_file_path(cls.IDS_FILE), "rb") as f:
+            for line in f:
+                # a line cut short by an interrupted write
+                if not line.endswith(b"\n"):
+                    break
+
+                ids.append(json.loads(line))
+                ids_ends.append(ids_ends[-1] + len(line))
+
+        vectors_rows = os.path.getsize(collection.get_file_path(cls.VECTORS_FILE)) // (4 * collection.size)
+
+        # an append interrupted halfway leaves some files longer than the others, the shortest wins
+        rows_count = min(len(alive), len(offsets), len(ids), vectors_rows)
+        collection.rows_count = rows_count
+        collection.alive = alive[:rows_count]
+        collection.offsets = offsets[:rows_count]
+        collection.ids = ids[:rows_count]
+
+        payloads_end = 0
+        if rows_count > 0:
+            with open(collection.get_file_path(cls.PAYLOADS_FILE), "rb") as f:
+                f.seek(int(collection.offsets[-1]))
+                _ = f.readline()
+                payloads_end = f.tell()
+
+        # and the longer files are cut back, the next append must start right after the last row
+        collection.truncate_files({
+            cls.VECTORS_FILE: rows_count * 4 * collection.size,
+            cls.ALIVE_FILE: rows_count,
+            cls.IDS_FILE: ids_ends[rows_count],
+            cls.PAYLOADS_FILE: payloads_end,
+            cls.OFFSETS_FILE: rows_count * 8,
+        })
+
+        collection.id_rows = {
+            point_id: row
+            for row, point_id in enumerate(collection.ids)
+            if collection.alive[row]
+        }
+
+        return collection
+
+    def get_vectors(self):
+        # re-mapped lazily after appends, reading rows is left to the page cache
+        if self.vectors is None or len(self.vectors) != self.rows_count:
+            if self.rows_count == 0:
+                self.vectors = np.zeros((0, self.size), dtype=np.float32)
+            else:
+                self.vectors = np.memmap(self.get_file_path(self.VECTORS_FILE), dtype=np.float32, mode="r",
+                                         shape=(self.rows_count, self.size))
+
+        return self.vectors
+
+    def prepare_vectors(self, vectors, is_normalized: bool = False):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.size:
+            raise ValueError(f"vectors of shape {vectors.shape} do not fit vector size {self.size}")
+
+        # cosine becomes a plain dot product on normalized rows
+        if self.distance == DistanceMethodEnums.COSINE.value and not is_normalized:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def set_dead(self, rows: list):
+        if len(rows) == 0:
+            return
+
+        self.alive[rows] = False
+
+        with open(self.get_file_path(self.ALIVE_FILE), "r+b") as f:
+            for row in rows:
+                f.seek(row)
+                f.write(b"\x00")
+
+    def append(self, ids: list, vectors, payloads: list, is_normalized: bool = False):
+        vectors = self.prepare_vectors(vectors, is_normalized=is_normalized)
+
+        # a row is written to every file, all of them must have one entry per id
+        if len(vectors) != len(ids) or len(payloads) != len(ids):
+            raise ValueError(f"{len(ids)} ids do not match {len(vectors)} vectors and {len(payloads)} payloads")
+
+        # the last occurrence of an id in the batch wins, as with consecutive upserts
+        last_positions = { point_id: i for i, point_id in enumerate(ids) }
+        if len(last_positions) < len(ids):
+            positions = sorted(last_positions.values())
+            ids = [ ids[i] for i in positions ]
+            vectors = vectors[positions]
+            payloads = [ payloads[i] for i in positions ]
+
+        with self.lock:
+            lines = [ (json.dumps(payload) + "\n").encode("utf-8") for payload in payloads ]
+
+            files_sizes = self.get_files_sizes()
+            payloads_end = files_sizes[self.PAYLOADS_FILE]
+            lines_sizes = np.fromiter((len(line) for line in lines), dtype=np.uint64, count=len(lines))
+            offsets = np.uint64(payloads_end) + np.concatenate([ np.zeros(1, dtype=np.uint64), np.cumsum(lines_sizes)[:-1] ])
+
+            try:
+                with open(self.get_file_path(self.PAYLOADS_FILE), "ab") as f:
+                    f.writelines(lines)
+
+                with open(self.get_file_path(self.VECTORS_FILE), "ab") as f:
+                    f.write(vectors.tobytes())
+
+                with open(self.get_file_path(self.OFFSETS_FILE), "ab") as f:
+                    f.write(offsets.astype(np.uint64).tobytes())
+
+                with open(self.get_file_path(self.IDS_FILE), "a") as f:
+                    f.writelines(json.dumps(point_id) + "\n" for point_id in ids)
+
+                # the alive flags go last, a row only counts once all of its files hold it
+                with open(self.get_file_path(self.ALIVE_FILE), "ab") as f:
+                    f.write(b"\x01" * len(ids))
+            except Exception:
+                # roll every file back, the rows of a later append must line up again
+                self.truncate_files(files_sizes)
+                raise
+
+            # an existing id is overwritten: its old row becomes a tombstone
+            self.set_dead([ self.id_rows[point_id] for point_id in ids if point_id in self.id_rows ])
+
+            first_row = self.rows_count
+            self.rows_count += len(ids)
+            self.alive = np.concatenate([ self.alive, np.ones(len(ids), dtype=bool) ])
+            self.offsets = np.concatenate([ self.offsets, offsets ])
+            self.ids.extend(ids)
+
+            for i, point_id in enumerate(ids):
+                self.id_rows[point_id] = first_row + i
+
+    def delete(self, ids: list):
+        with self.lock:
+            rows = [ self.id_rows.pop(point_id) for point_id in ids if point_id in self.id_rows ]
+            self.set_dead(rows)
+
+        return len(rows)
+
+    def read_payloads(self, rows: list):
+        payloads = []
+
+        with open(self.get_file_path(self.PAYLOADS_FILE), "rb") as f:
+            for row in rows:
+                f.seek(int(self.offsets[row]))
+                payloads.append(json.loads(f.readline()))
+
+        return payloads
+
+    def search(self, vector, limit: int):
+        return self.search_batch(vectors=[vector], limit=limit)[0]
+
+    def search_batch(self, vectors, limit: int):
+        queries = self.prepare_vectors(vectors)
+
+        # rows, ids and payload offsets must all come from the same state, which a
+        # compaction replaces, so the lock is held until the payloads are read
+        with self.lock:
+            matrix = self.get_vectors()
+
+            if len(matrix) == 0:
+                return [ [] for _ in queries ]
+
+            # one matrix product scores every query against every row
+            scores = queries @ matrix.T
+            scores[:, ~self.alive[:matrix.shape[0]]] = -np.inf
+
+            # top-k without sorting every score
+            limit = min(limit, scores.shape[1])
+            top_rows = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+
+            results = []
+            for query_scores, query_top_rows in zip(scores, top_rows):
+                query_top_rows = query_top_rows[np.argsort(-query_scores[query_top_rows])]
+                query_top_rows = [ row for row in query_top_rows if np.isfinite(query_scores[row]) ]
+
+                results.append([
+                    (self.ids[row], float(query_scores[row]), payload)
+                    for row, payload in zip(query_top_rows, self.read_payloads(rows=query_top_rows))
+                ])
+
+        return results
+
+    def get_alive_ids(self):
+        with self.lock:
+            return list(self.id_rows.keys())
+
+    def get_info(self):
+        with self.lock:
+            return {
+                "size": self.size,
+                "distance": self.distance,
+                "points_count": len(self.id_rows),
+                "rows_count": self.rows_count,
+                "deleted_rows_count": self.rows_count - len(self.id_rows),
+            }
+
+    def compact(self):
+        """Rewrite the collection without its deleted rows, then reopen it in place: whoever
+        holds this object sees the compacted rows once the lock is released."""
+
+        with self.lock:
+            rows = np.flatnonzero(self.alive[:self.rows_count])
+            vectors = np.array(self.get_vectors()[rows]) if len(rows) else np.zeros((0, self.size), dtype=np.float32)
+            ids = [ self.ids[row] for row in rows ]
+            payloads = self.read_payloads(rows=rows)
+
+            self.vectors = None
+            compacted_path = self.path + ".compacting"
+            shutil.rmtree(compacted_path, ignore_errors=True)
+
+            compacted = NumpyCollection.create(path=compacted_path, size=self.size, distance=self.distance)
+            if len(ids):
+                compacted.append(ids=ids, vectors=vectors, payloads=payloads, is_normalized=True)
+
+            # moved aside first, the collection directory is never missing for long
+            replaced_path = self.path + ".replaced"
+            shutil.rmtree(replaced_path, ignore_errors=True)
+            os.replace(self.path, replaced_path)
+            os.replace(compacted_path, self.path)
+            shutil.rmtree(replaced_path)
+
+            reopened = NumpyCollection.load(path=self.path)
+
+            self.rows_count = reopened.rows_count
+            self.alive = reopened.alive
+            self.ids = reopened.ids
+            self.id_rows = reopened.id_rows
+            self.offsets = reopened.offsets
+            self.vectors = None
+
+        return self
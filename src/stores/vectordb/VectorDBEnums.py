@@ -2,7 +2,13 @@ from enum import Enum
 
 class VectorDBEnums(Enum):
     QDRANT = "QDRANT"
+    NUMPY = "NUMPY"
 
 class DistanceMethodEnums(Enum):
     COSINE = "cosine"
     DOT = "dot"
+
+class QuantizationEnums(Enum):
+    NONE = "none"
+    INT8 = "int8"
+    BINARY = "binary"
@@ -31,7 +31,8 @@ class VectorDBInterface(ABC):
     @abstractmethod
     def create_collection(self, collection_name: str, 
                                 embedding_size: int,
-                                do_reset: bool = False):
+                                do_reset: bool = False,
+                                collection_config: dict = None):
         pass
 
     @abstractmethod
@@ -43,10 +44,24 @@ class VectorDBInterface(ABC):
     @abstractmethod
     def insert_many(self, collection_name: str, texts: list, 
                           vectors: list, metadata: list = None, 
-                          record_ids: list = None, batch_size: int = 50):
+                          record_ids: list = None, batch_size: int = None):
         pass
 
     @abstractmethod
-    def search_by_vector(self, collection_name: str, vector: list, limit: int) -> List[RetrievedDocument]:
+    def get_all_record_ids(self, collection_name: str, batch_size: int = 1000):
+        pass
+
+    @abstractmethod
+    def delete_many(self, collection_name: str, record_ids: list):
+        pass
+
+    @abstractmethod
+    def search_by_vector(self, collection_name: str, vector: list, limit: int,
+                               collection_config: dict = None) -> List[RetrievedDocument]:
+        pass
+
+    @abstractmethod
+    def search_batch(self, collection_name: str, vectors: list, limit: int,
+                           collection_config: dict = None) -> List[List[RetrievedDocument]]:
         pass
     
\ No newline at end of file
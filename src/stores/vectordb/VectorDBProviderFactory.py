@@ -1,4 +1,4 @@
-from .providers import QdrantDBProvider
+from .providers import QdrantDBProvider, NumpyDBProvider
 from .VectorDBEnums import VectorDBEnums
 from controllers.BaseController import BaseController
 
@@ -14,6 +14,30 @@ class VectorDBProviderFactory:
             return QdrantDBProvider(
                 db_path=db_path,
                 distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
+                url=self.config.VECTOR_DB_URL,
+                api_key=self.config.VECTOR_DB_API_KEY,
+                insert_batch_size=self.config.VECTOR_DB_INSERT_BATCH_SIZE,
+                insert_parallel=self.config.VECTOR_DB_INSERT_PARALLEL,
+                metadata_ttl_seconds=self.config.VECTOR_DB_METADATA_TTL_SECONDS,
+                default_collection_config={
+                    "quantization": self.config.VECTOR_DB_QUANTIZATION,
+                    "quantization_always_ram": self.config.VECTOR_DB_QUANTIZATION_ALWAYS_RAM,
+                    "on_disk_vectors": self.config.VECTOR_DB_ON_DISK_VECTORS,
+                    "on_disk_payload": self.config.VECTOR_DB_ON_DISK_PAYLOAD,
+                    "hnsw_m": self.config.VECTOR_DB_HNSW_M,
+                    "hnsw_ef_construct": self.config.VECTOR_DB_HNSW_EF_CONSTRUCT,
+                    "search_rescore": self.config.VECTOR_DB_SEARCH_RESCORE,
+                    "search_oversampling": self.config.VECTOR_DB_SEARCH_OVERSAMPLING,
+                    "search_hnsw_ef": self.config.VECTOR_DB_SEARCH_HNSW_EF,
+                },
+            )
+
+        if provider == VectorDBEnums.NUMPY.value:
+            db_path = self.base_controller.get_database_path(db_name=self.config.VECTOR_DB_PATH)
+
+            return NumpyDBProvider(
+                db_path=db_path,
+                distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
             )
         
         return None
@@ -0,0 +1,227 @@
+from ..VectorDBInterface import VectorDBInterface
+from ..VectorDBEnums import DistanceMethodEnums
+from ..NumpyCollection import NumpyCollection
+import logging
+import numpy as np
+import os
+import shutil
+import threading
+import uuid
+from typing import List
+from models.db_schemes import RetrievedDocument
+
+class NumpyDBProvider(VectorDBInterface):
+    """Exact search over memory-mapped float32 matrices, one directory per collection.
+    Meant for small and medium projects, where a brute force matrix-vector product is
+    as fast as an index and nothing has to be built or loaded up front."""
+
+    def __init__(self, db_path: str, distance_method: str, compact_deleted_ratio: float = 0.5):
+
+        self.db_path = db_path
+        self.distance_method = distance_method or DistanceMethodEnums.COSINE.value
+
+        # a collection is rewritten once this share of its rows are tombstones
+        self.compact_deleted_ratio = compact_deleted_ratio
+
+        self.collections = {}
+        self.lock = threading.Lock()
+
+        self.logger = logging.getLogger(__name__)
+
+    def connect(self):
+        os.makedirs(self.db_path, exist_ok=True)
+
+    def disconnect(self):
+        self.collections = {}
+
+    def get_collection_path(self, collection_name: str):
+        return os.path.join(self.db_path, collection_name)
+
+    def get_collection(self, collection_name: str):
+        # opened on first use, only ids, flags and payload offsets are read
+        with self.lock:
+            if collection_name not in self.collections:
+                if not self.is_collection_existed(collection_name):
+                    return None
+
+                self.collections[collection_name] = NumpyCollection.load(
+                    path=self.get_collection_path(collection_name)
+                )
+
+            return self.collections[collection_name]
+
+    def is_collection_existed(self, collection_name: str) -> bool:
+        return os.path.exists(os.path.join(self.get_collection_path(collection_name), NumpyCollection.META_FILE))
+
+    def list_all_collections(self) -> List:
+        return [
+            collection_name
+            for collection_name in sorted(os.listdir(self.db_path))
+            if self.is_collection_existed(collection_name)
+        ]
+
+    def get_collection_info(self, collection_name: str) -> dict:
+        collection = self.get_collection(collection_name)
+        if collection is None:
+            return None
+
+        return collection.get_info()
+
+    def delete_collection(self, collection_name: str):
+        with self.lock:
+            _ = self.collections.pop(collection_name, None)
+
+            if self.is_collection_existed(collection_name):
+                shutil.rmtree(self.get_collection_path(collection_name))
+                return True
+
+        return False
+
+    def create_collection(self, collection_name: str,
+                                embedding_size: int,
+                                do_reset: bool = False,
+                                collection_config: dict = None):
+        if do_reset:
+            _ = self.delete_collection(collection_name=collection_name)
+
+        with self.lock:
+            if self.is_collection_existed(collection_name):
+                return False
+
+            self.collections[collection_name] = NumpyCollection.create(
+                path=self.get_collection_path(collection_name),
+                size=embedding_size,
+                distance=self.distance_method,
+            )
+
+        return True
+
+    def insert_one(self, collection_name: str, text: str, vector: list,
+                         metadata: dict = None,
+                         record_id: str = None):
+
+        return self.insert_many(
+            collection_name=collection_name,
+            texts=[text],
+            vectors=[vector],
+            metadata=[metadata],
+            record_ids=[record_id if record_id is not None else str(uuid.uuid4())],
+        )
+
+    def insert_many(self, collection_name: str, texts: list,
+                          vectors: list, metadata: list = None,
+                          record_ids: list = None, batch_size: int = None):
+
+        collection = self.get_collection(collection_name)
+        if collection is None:
+            self.logger.error(f"Can not insert new records to non-existed collection: {collection_name}")
+            return False
+
+        if len(texts) == 0:
+            return True
+
+        if metadata is None:
+            metadata = [None] * len(texts)
+
+        if record_ids is None:
+            record_ids = [ str(uuid.uuid4()) for _ in texts ]
+
+        try:
+            # ragged or missing vectors fail here, like any other bad batch
+            vectors = np.asarray(vectors, dtype=np.float32)
+            if vectors.ndim != 2 or vectors.shape != (len(texts), collection.size) \
+                    or len(metadata) != len(texts) or len(record_ids) != len(texts):
+                self.logger.error(f"Can not insert vectors of shape {vectors.shape} with {len(texts)} texts, "
+                                  f"{len(record_ids)} ids and {len(metadata)} metadata "
+                                  f"to collection: {collection_name} of vector size {collection.size}")
+                return False
+
+            collection.append(
+                ids=list(record_ids),
+                vectors=vectors,
+                payloads=[
+                    { "text": text, "metadata": text_metadata }
+                    for text, text_metadata in zip(texts, metadata)
+                ],
+            )
+        except Exception as e:
+            self.logger.error(f"Error while inserting batch: {e}")
+            return False
+
+        self.compact_if_needed(collection_name=collection_name)
+
+        return True
+
+    def get_all_record_ids(self, collection_name: str, batch_size: int = 1000):
+
+        collection = self.get_collection(collection_name)
+        if collection is None:
+            return
+
+        yield from collection.get_alive_ids()
+
+    def delete_many(self, collection_name: str, record_ids: list):
+
+        collection = self.get_collection(collection_name)
+        if collection is None:
+            return False
+
+        try:
+            _ = collection.delete(ids=record_ids)
+        except Exception as e:
+            self.logger.error(f"Error while deleting records: {e}")
+            return False
+
+        self.compact_if_needed(collection_name=collection_name)
+
+        return True
+
+    def compact_if_needed(self, collection_name: str):
+        collection = self.get_collection(collection_name)
+        info = collection.get_info()
+
+        if info["rows_count"] == 0 or info["deleted_rows_count"] / info["rows_count"] < self.compact_deleted_ratio:
+            return False
+
+        # compacted in place, a search holding the collection keeps working on it
+        collection.compact()
+
+        return True
+
+    def search_by_vector(self, collection_name: str, vector: list, limit: int = 5,
+                               collection_config: dict = None):
+
+        collection = self.get_collection(collection_name)
+        if collection is None:
+            return None
+
+        results = collection.search(vector=vector, limit=limit)
+
+        if not results or len(results) == 0:
+            return None
+
+        return [
+            RetrievedDocument(**{
+                "score": score,
+                "text": payload["text"],
+            })
+            for _, score, payload in results
+        ]
+
+    def search_batch(self, collection_name: str, vectors: list, limit: int = 5,
+                           collection_config: dict = None):
+
+        collection = self.get_collection(collection_name)
+        if collection is None:
+            return None
+
+        return [
+            [
+                RetrievedDocument(**{
+                    "score": score,
+                    "text": payload["text"],
+                })
+                for _, score, payload in results
+            ]
+            for results in collection.search_batch(vectors=vectors, limit=limit)
+        ]
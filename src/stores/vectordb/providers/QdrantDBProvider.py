@@ -1,33 +1,91 @@
 from qdrant_client import models, QdrantClient
 from ..VectorDBInterface import VectorDBInterface
-from ..VectorDBEnums import DistanceMethodEnums
+from ..VectorDBEnums import DistanceMethodEnums, QuantizationEnums
+from helpers.ttl_cache import TTLCache
 import logging
+import numpy as np
+import threading
+import uuid
 from typing import List
 from models.db_schemes import RetrievedDocument
 
 class QdrantDBProvider(VectorDBInterface):
 
-    def __init__(self, db_path: str, distance_method: str):
+    def __init__(self, db_path: str, distance_method: str,
+                       url: str = None, api_key: str = None,
+                       insert_batch_size: int = 256, insert_parallel: int = 1,
+                       default_collection_config: dict = None,
+                       metadata_ttl_seconds: float = 30):
 
         self.client = None
         self.db_path = db_path
         self.distance_method = None
 
+        # a qdrant server when set, the local store under db_path otherwise. Local mode keeps
+        # every vector in memory and ignores quantization, on disk storage and hnsw settings
+        self.url = url
+        self.api_key = api_key
+
+        self.insert_batch_size = insert_batch_size
+        # worker processes of upload_collection, only used with a qdrant server (url)
+        self.insert_parallel = insert_parallel
+
+        # quantization, on disk storage, hnsw and search settings, see get_collection_config
+        self.default_collection_config = default_collection_config or {}
+
         if distance_method == DistanceMethodEnums.COSINE.value:
             self.distance_method = models.Distance.COSINE
         elif distance_method == DistanceMethodEnums.DOT.value:
             self.distance_method = models.Distance.DOT
 
+        # collection name -> {"size", "distance"}, only for existing collections. Entries expire,
+        # other processes sharing a qdrant server may create or delete collections meanwhile
+        self.collections_metadata = TTLCache(max_entries=10000, ttl_seconds=metadata_ttl_seconds)
+        self.lock = threading.Lock()
+
         self.logger = logging.getLogger(__name__)
 
     def connect(self):
-        self.client = QdrantClient(path=self.db_path)
+        if self.url:
+            self.client = QdrantClient(url=self.url, api_key=self.api_key)
+        else:
+            self.client = QdrantClient(path=self.db_path)
+        self.collections_metadata.clear()
 
     def disconnect(self):
         self.client = None
+        self.collections_metadata.clear()
+
+    def get_collection_metadata(self, collection_name: str):
+        # asked on every insert and search, the store is only queried once per collection and ttl.
+        # a missing collection is never cached, it is asked again until it exists
+        with self.lock:
+            metadata = self.collections_metadata.get(collection_name)
+
+        if metadata is not None:
+            return metadata
+
+        if self.client.collection_exists(collection_name=collection_name):
+            vectors_config = self.client.get_collection(collection_name=collection_name).config.params.vectors
+            metadata = {
+                "size": vectors_config.size,
+                "distance": vectors_config.distance,
+            }
+
+            self.set_collection_metadata(collection_name, metadata=metadata)
+
+        return metadata
+
+    def set_collection_metadata(self, collection_name: str, metadata: dict = None):
+        # no metadata forgets the collection, the next call asks the store again
+        with self.lock:
+            if metadata is None:
+                _ = self.collections_metadata.pop(collection_name)
+            else:
+                self.collections_metadata.set(collection_name, metadata)
 
     def is_collection_existed(self, collection_name: str) -> bool:
-        return self.client.collection_exists(collection_name=collection_name)
+        return self.get_collection_metadata(collection_name) is not None
     
     def list_all_collections(self) -> List:
         return self.client.get_collections()
@@ -37,22 +95,86 @@ class QdrantDBProvider(VectorDBInterface):
     
     def delete_collection(self, collection_name: str):
         if self.is_collection_existed(collection_name):
-            return self.client.delete_collection(collection_name=collection_name)
+            is_deleted = self.client.delete_collection(collection_name=collection_name)
+            self.set_collection_metadata(collection_name, metadata=None)
+
+            return is_deleted
         
+    def get_collection_config(self, collection_config: dict = None):
+        # the values a project sets override the defaults from the settings
+        return {
+            **self.default_collection_config,
+            **{ key: value for key, value in (collection_config or {}).items() if value is not None },
+        }
+
+    def get_quantization_config(self, config: dict):
+        quantization = config.get("quantization")
+        always_ram = config.get("quantization_always_ram")
+
+        if quantization == QuantizationEnums.INT8.value:
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, always_ram=always_ram)
+            )
+
+        if quantization == QuantizationEnums.BINARY.value:
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=always_ram)
+            )
+
+        return None
+
+    def get_search_params(self, config: dict):
+        # rescoring re-ranks the quantized candidates with the original vectors, qdrant
+        # ignores it on collections without quantization
+        return models.SearchParams(
+            hnsw_ef=config.get("search_hnsw_ef"),
+            quantization=models.QuantizationSearchParams(
+                rescore=config.get("search_rescore"),
+                oversampling=config.get("search_oversampling"),
+            ),
+        )
+
     def create_collection(self, collection_name: str, 
                                 embedding_size: int,
-                                do_reset: bool = False):
+                                do_reset: bool = False,
+                                collection_config: dict = None):
+        # asked to the store, another process may have created or deleted it meanwhile
+        self.set_collection_metadata(collection_name, metadata=None)
+
         if do_reset:
             _ = self.delete_collection(collection_name=collection_name)
         
         if not self.is_collection_existed(collection_name):
-            _ = self.client.create_collection(
-                collection_name=collection_name,
-                vectors_config=models.VectorParams(
-                    size=embedding_size,
-                    distance=self.distance_method
+            config = self.get_collection_config(collection_config=collection_config)
+
+            hnsw_config = None
+            if config.get("hnsw_m") is not None or config.get("hnsw_ef_construct") is not None:
+                hnsw_config = models.HnswConfigDiff(m=config.get("hnsw_m"), ef_construct=config.get("hnsw_ef_construct"))
+
+            try:
+                _ = self.client.create_collection(
+                    collection_name=collection_name,
+                    vectors_config=models.VectorParams(
+                        size=embedding_size,
+                        distance=self.distance_method,
+                        on_disk=config.get("on_disk_vectors"),
+                    ),
+                    on_disk_payload=config.get("on_disk_payload"),
+                    hnsw_config=hnsw_config,
+                    quantization_config=self.get_quantization_config(config=config),
                 )
-            )
+            except Exception as e:
+                # e.g. a conflict, another process created it first
+                self.set_collection_metadata(collection_name, metadata=None)
+                if self.is_collection_existed(collection_name):
+                    return False
+
+                raise e
+
+            self.set_collection_metadata(collection_name, metadata={
+                "size": embedding_size,
+                "distance": self.distance_method,
+            })
 
             return True
         
@@ -67,72 +189,161 @@ class QdrantDBProvider(VectorDBInterface):
             return False
         
         try:
-            _ = self.client.upload_records(
+            _ = self.client.upsert(
                 collection_name=collection_name,
-                records=[
-                    models.Record(
-                        id=[record_id],
-                        vector=vector,
+                points=[
+                    models.PointStruct(
+                        id=record_id if record_id is not None else str(uuid.uuid4()),
+                        vector=np.asarray(vector, dtype=np.float32).tolist(),
                         payload={
                             "text": text, "metadata": metadata
                         }
                     )
-                ]
+                ],
+                wait=True,
             )
         except Exception as e:
             self.logger.error(f"Error while inserting batch: {e}")
+            self.set_collection_metadata(collection_name, metadata=None)
             return False
 
         return True
+
+    def upsert_batch(self, collection_name: str, record_ids: list, vectors: np.ndarray,
+                           payloads: list, wait: bool = False):
+        # columnar points, one list per field instead of one object per point
+        return self.client.upsert(
+            collection_name=collection_name,
+            points=models.Batch(
+                ids=record_ids,
+                vectors=vectors.tolist(),
+                payloads=payloads,
+            ),
+            wait=wait,
+        )
     
     def insert_many(self, collection_name: str, texts: list, 
                           vectors: list, metadata: list = None, 
-                          record_ids: list = None, batch_size: int = 50):
-        
+                          record_ids: list = None, batch_size: int = None):
+        """Upsert the points in batches without waiting for each of them to be applied. The
+        vectors can be a list of lists or a numpy array, they are sent as float32."""
+
+        if len(texts) == 0:
+            return True
+
+        collection_metadata = self.get_collection_metadata(collection_name)
+        if collection_metadata is None:
+            self.logger.error(f"Can not insert new records to non-existed collection: {collection_name}")
+            return False
+
+        if batch_size is None:
+            batch_size = self.insert_batch_size
+
         if metadata is None:
             metadata = [None] * len(texts)
 
         if record_ids is None:
             record_ids = list(range(0, len(texts)))
 
-        for i in range(0, len(texts), batch_size):
-            batch_end = i + batch_size
-
-            batch_texts = texts[i:batch_end]
-            batch_vectors = vectors[i:batch_end]
-            batch_metadata = metadata[i:batch_end]
-            batch_record_ids = record_ids[i:batch_end]
-
-            batch_records = [
-                models.Record(
-                    id=batch_record_ids[x],
-                    vector=batch_vectors[x],
-                    payload={
-                        "text": batch_texts[x], "metadata": batch_metadata[x]
-                    }
-                )
+        payloads = [
+            { "text": text, "metadata": text_metadata }
+            for text, text_metadata in zip(texts, metadata)
+        ]
 
-                for x in range(len(batch_texts))
-            ]
+        try:
+            # ragged or missing vectors fail here, like any other bad batch
+            vectors = np.asarray(vectors, dtype=np.float32)
+            if vectors.ndim != 2 or vectors.shape[1] != collection_metadata["size"]:
+                self.logger.error(f"Can not insert vectors of shape {vectors.shape} to collection: {collection_name} "
+                                  f"of vector size {collection_metadata['size']}")
+                return False
 
-            try:
-                _ = self.client.upload_records(
+            # the local store writes every point itself, upload workers only help a server
+            if self.insert_parallel > 1 and self.url:
+                _ = self.client.upload_collection(
                     collection_name=collection_name,
-                    records=batch_records,
+                    vectors=vectors,
+                    payload=payloads,
+                    ids=record_ids,
+                    batch_size=batch_size,
+                    parallel=self.insert_parallel,
+                    wait=False,
                 )
-            except Exception as e:
-                self.logger.error(f"Error while inserting batch: {e}")
-                return False
+
+                # updates are applied in order, once this one is applied every earlier one is too
+                _ = self.upsert_batch(collection_name=collection_name, record_ids=record_ids[-1:],
+                                      vectors=vectors[-1:], payloads=payloads[-1:], wait=True)
+            else:
+                for i in range(0, len(texts), batch_size):
+                    batch_end = i + batch_size
+
+                    # only the last batch is waited for, it is the consistency barrier of the whole call
+                    _ = self.upsert_batch(
+                        collection_name=collection_name,
+                        record_ids=record_ids[i:batch_end],
+                        vectors=vectors[i:batch_end],
+                        payloads=payloads[i:batch_end],
+                        wait=batch_end >= len(texts),
+                    )
+        except Exception as e:
+            self.logger.error(f"Error while inserting batch: {e}")
+            # e.g. deleted by another process, the next call asks the store again
+            self.set_collection_metadata(collection_name, metadata=None)
+            return False
 
         return True
         
-    def search_by_vector(self, collection_name: str, vector: list, limit: int = 5):
+    def get_all_record_ids(self, collection_name: str, batch_size: int = 1000):
 
-        results = self.client.search(
-            collection_name=collection_name,
-            query_vector=vector,
-            limit=limit
-        )
+        if not self.is_collection_existed(collection_name):
+            return
+
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+
+            for record in records:
+                yield record.id
+
+            if offset is None:
+                break
+
+    def delete_many(self, collection_name: str, record_ids: list):
+
+        if not self.is_collection_existed(collection_name):
+            return False
+
+        try:
+            _ = self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.PointIdsList(points=record_ids),
+            )
+        except Exception as e:
+            self.logger.error(f"Error while deleting records: {e}")
+            self.set_collection_metadata(collection_name, metadata=None)
+            return False
+
+        return True
+        
+    def search_by_vector(self, collection_name: str, vector: list, limit: int = 5,
+                               collection_config: dict = None):
+
+        try:
+            results = self.client.search(
+                collection_name=collection_name,
+                query_vector=vector,
+                limit=limit,
+                search_params=self.get_search_params(config=self.get_collection_config(collection_config=collection_config)),
+            )
+        except Exception as e:
+            self.set_collection_metadata(collection_name, metadata=None)
+            raise e
 
         if not results or len(results) == 0:
             return None
@@ -145,3 +356,41 @@ class QdrantDBProvider(VectorDBInterface):
             for result in results
         ]
 
+    def search_batch(self, collection_name: str, vectors: list, limit: int = 5,
+                           collection_config: dict = None):
+
+        if not self.is_collection_existed(collection_name):
+            self.logger.error(f"Can not search a non-existed collection: {collection_name}")
+            return None
+
+        search_params = self.get_search_params(config=self.get_collection_config(collection_config=collection_config))
+
+        # every query in a single request
+        try:
+            batch_results = self.client.search_batch(
+                collection_name=collection_name,
+                requests=[
+                    models.SearchRequest(
+                        vector=vector,
+                        limit=limit,
+                        with_payload=True,
+                        params=search_params,
+                    )
+                    for vector in np.asarray(vectors, dtype=np.float32).tolist()
+                ]
+            )
+        except Exception as e:
+            self.set_collection_metadata(collection_name, metadata=None)
+            raise e
+
+        return [
+            [
+                RetrievedDocument(**{
+                    "score": result.score,
+                    "text": result.payload["text"],
+                })
+                for result in results
+            ]
+            for results in batch_results
+        ]
+